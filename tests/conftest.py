@@ -0,0 +1,27 @@
+"""The modules live at the repository root; make them importable from tests/."""
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vector_core  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def source_image():
+    """A deterministic blurred-noise image with plenty of edges."""
+    rng = np.random.default_rng(1)
+    img = (rng.random((180, 240, 3)) * 255).astype(np.uint8)
+    return cv2.GaussianBlur(img, (7, 7), 0)
+
+
+@pytest.fixture(scope="session")
+def source_contours(source_image):
+    """The source image's contours as a list of (N, 1, 2) int32 arrays, as findContours returns them."""
+    _, contours = vector_core.extract_contours(source_image, 10, 60, 10)
+    assert len(contours) > 10
+    return contours
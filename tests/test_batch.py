@@ -0,0 +1,26 @@
+"""Batch output naming must never let two inputs write the same file."""
+import os
+
+import vector_batch
+
+
+def test_output_paths_keep_folders(tmp_path):
+    paths = [str(tmp_path / "x" / "p.png"), str(tmp_path / "y" / "p.png"), str(tmp_path / "y" / "sub" / "r.jpg")]
+    outputs, clashes = vector_batch.output_paths(paths, "out")
+    assert clashes == {}
+    assert outputs == {paths[0]: os.path.join("out", "x", "p_vector.png"),
+                       paths[1]: os.path.join("out", "y", "p_vector.png"),
+                       paths[2]: os.path.join("out", "y", "sub", "r_vector.png")}
+
+
+def test_output_paths_flat_for_one_folder(tmp_path):
+    paths = [str(tmp_path / "a.png"), str(tmp_path / "b.png")]
+    outputs, _ = vector_batch.output_paths(paths, "out", "_tiles")
+    assert list(outputs.values()) == [os.path.join("out", "a_vector_tiles"), os.path.join("out", "b_vector_tiles")]
+
+
+def test_output_paths_report_clashes(tmp_path):
+    paths = [str(tmp_path / "q.jpg"), str(tmp_path / "q.png")]
+    outputs, clashes = vector_batch.output_paths(paths, "out")
+    assert list(outputs) == [paths[0]]
+    assert clashes == {paths[1]: paths[0]}
@@ -0,0 +1,25 @@
+"""The baseline check must flag real slowdowns and ignore timings too short to measure."""
+import vector_bench
+
+
+def results(**metrics):
+    return {"cases": [{"name": "case", "metrics": {"finish": metrics}}]}
+
+
+def test_rates_from_short_timings_are_not_compared():
+    before = results(solid_ms=0.5, solid_segments_per_s=2e6)
+    after = results(solid_ms=0.8, solid_segments_per_s=1.25e6)
+    assert vector_bench.compare(after, before, 0.15) == []
+
+
+def test_rates_from_long_timings_are_compared():
+    before = results(solid_ms=50.0, solid_segments_per_s=2e6)
+    after = results(solid_ms=80.0, solid_segments_per_s=1.25e6)
+    flagged = vector_bench.compare(after, before, 0.15)
+    assert [line.split(":")[0] for line in flagged] == ["case finish.solid_ms", "case finish.solid_segments_per_s"]
+
+
+def test_timing_metric_names():
+    assert vector_bench.timing_metric("solid_segments_per_s") == "solid_ms"
+    assert vector_bench.timing_metric("segments_per_s") == "total_ms"
+    assert vector_bench.timing_metric("contours_per_s") == "total_ms"
@@ -0,0 +1,58 @@
+"""PipelineCache: stage reuse, hit/miss counts and the byte budget."""
+import numpy as np
+
+import vector_core
+
+
+def test_min_len_change_reuses_edges(source_image):
+    cache = vector_core.PipelineCache()
+    edges, contours = cache.extract_contours(source_image, 10, 60, 10)
+    assert (cache.hits, cache.misses) == (0, 3)  # gray, edges, contours
+
+    # Only the contour filter depends on min_len
+    edges2, contours2 = cache.extract_contours(source_image, 10, 60, 30)
+    assert edges2 is edges
+    assert (cache.hits, cache.misses) == (1, 4)
+    assert len(contours2) < len(contours)
+
+    # Nothing changed: everything comes from the cache
+    cache.extract_contours(source_image, 10, 60, 30)
+    assert (cache.hits, cache.misses) == (3, 4)
+
+    # New thresholds reuse only the grayscale image
+    cache.extract_contours(source_image, 20, 80, 10)
+    assert (cache.hits, cache.misses) == (4, 6)
+
+
+def test_cached_results_match_uncached(source_image):
+    cache = vector_core.PipelineCache()
+    cache.extract_contours(source_image, 10, 60, 10)
+    edges, contours = cache.extract_contours(source_image, 10, 60, 10)
+    expected_edges, expected = vector_core.extract_contours(source_image, 10, 60, 10)
+    assert np.array_equal(edges, expected_edges)
+    assert len(contours) == len(expected)
+    assert all(np.array_equal(a, b) for a, b in zip(contours, expected))
+
+
+def test_byte_budget_evicts_least_recently_used():
+    cache = vector_core.PipelineCache(max_bytes=250)
+    for key in "abc":
+        cache.stage(key, lambda: np.zeros(100, dtype=np.uint8))
+    assert len(cache) == 2 and cache.bytes_used == 200  # "a" went first
+
+    cache.stage("b", lambda: None)  # A hit makes "b" the most recent
+    cache.stage("d", lambda: np.zeros(100, dtype=np.uint8))
+    assert len(cache) == 2 and cache.bytes_used == 200
+
+    calls = []
+    for key in "bdc":
+        cache.stage(key, lambda: calls.append(key) or np.zeros(100, dtype=np.uint8))
+    assert calls == ["c"]  # "c" was evicted, "b" and "d" were kept
+
+
+def test_oversized_value_is_not_cached():
+    cache = vector_core.PipelineCache(max_bytes=250)
+    cache.stage("small", lambda: np.zeros(100, dtype=np.uint8))
+    big = cache.stage("big", lambda: np.zeros(1000, dtype=np.uint8))
+    assert len(big) == 1000
+    assert len(cache) == 1 and cache.bytes_used == 100
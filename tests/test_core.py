@@ -0,0 +1,57 @@
+"""Tests for the contour store and segment plan in vector_core."""
+import numpy as np
+
+import vector_core
+
+WIDE = 32767  # Widest canvas whose coordinates still pack as int16
+
+
+def wide_source():
+    """A 4-row image whose pixel at x encodes x in its blue and green channels."""
+    img = np.zeros((4, WIDE, 3), dtype=np.uint8)
+    xs = np.arange(WIDE)
+    img[:, :, 0] = xs % 256
+    img[:, :, 1] = xs // 256
+    return img
+
+
+def test_sampled_colors_past_int16_midpoint():
+    # Midpoints of int16 coordinates above 16383 used to wrap negative
+    contours = [np.array([[[17990, 1]], [[18010, 1]]], dtype=np.int32),
+                np.array([[[32700, 1]], [[32766, 2]]], dtype=np.int32)]
+    store = vector_core.ContourStore.from_contours(contours)
+    assert store.points.dtype == np.int16
+
+    plan = vector_core.SegmentPlan(store, wide_source())
+    sampled_x = plan.colors[:, 0].astype(int) + plan.colors[:, 1].astype(int) * 256
+    assert sampled_x.tolist() == [18000, 32733]
+
+
+def test_wide_canvas_tiles_match_full_draw():
+    # A one-pixel-step contour running to the last int16 column
+    xs = np.arange(16000, WIDE)
+    ys = (xs // 7) % 4
+    contours = [np.stack((xs, ys), axis=1).reshape(-1, 1, 2).astype(np.int32)]
+    plan = vector_core.SegmentPlan(vector_core.ContourStore.from_contours(contours), wide_source())
+    runs = plan.runs(0, len(plan), True)
+    bboxes = plan.run_bboxes(runs[0], runs[1])
+    assert bboxes.dtype == np.int32
+
+    full = plan.draw(vector_core.new_canvas((4, WIDE), (0, 0, 0)), 0, len(plan), 3, (0, 255, 0), True)
+    for box in ((16000, 0, 24000, 4), (24000, 0, WIDE, 4)):
+        tile = vector_core.render_tile(plan, runs, bboxes, box, (WIDE, 4), 3, (0, 255, 0), (0, 0, 0))
+        assert np.array_equal(tile, full[box[1]:box[3], box[0]:box[2]])
+
+
+def test_tiles_match_full_draw_with_long_segments():
+    # Simplified contours have long shallow segments, which cv2 steps differently once clipped
+    contours = [np.array([[[0, 0]], [[699, 3]], [[100, 7]], [[650, 1]]], dtype=np.int32)]
+    plan = vector_core.SegmentPlan(vector_core.ContourStore.from_contours(contours))
+    runs = plan.runs(0, len(plan))
+    bboxes = plan.run_bboxes(runs[0], runs[1])
+    for thickness in (1, 3):
+        full = plan.draw(vector_core.new_canvas((8, 700), (0, 0, 0)), 0, len(plan), thickness, (0, 255, 0))
+        for x0 in range(0, 700, 100):
+            box = (x0, 0, x0 + 100, 8)
+            tile = vector_core.render_tile(plan, runs, bboxes, box, (700, 8), thickness, (0, 255, 0), (0, 0, 0))
+            assert np.array_equal(tile, full[:, x0:x0 + 100])
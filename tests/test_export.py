@@ -0,0 +1,47 @@
+"""SVG export must encode exactly the plan's runs and colors."""
+import re
+
+import numpy as np
+import pytest
+
+import vector_core
+import vector_export
+
+
+def parse_svg_paths(text):
+    """Returns [(stroke, [points of each subpath])] from an exported SVG, relative moves resolved."""
+    paths = []
+    for stroke, d in re.findall(r'<path stroke="(#[0-9a-f]{6})" d="([^"]*)"', text):
+        subpaths, pen = [], np.zeros(2, dtype=np.int64)
+        for cmd, body in re.findall(r"([mM])([^mM]*)", d):
+            values = np.array(re.findall(r"-?\d+", body), dtype=np.int64).reshape(-1, 2)
+            if cmd == "m":
+                # The first m of a path is absolute; later ones are relative to the pen
+                if subpaths:
+                    values[0] += pen
+                values = np.cumsum(values, axis=0)
+            pen = values[-1]
+            subpaths.append(values)
+        paths.append((stroke, subpaths))
+    return paths
+
+
+@pytest.mark.parametrize("compact", [True, False])
+@pytest.mark.parametrize("sampled,merge", [(False, True), (True, True), (True, False)])
+def test_svg_round_trip(tmp_path, source_image, source_contours, sampled, merge, compact):
+    store = vector_core.ContourStore.from_contours(source_contours, "chain")
+    plan = vector_core.SegmentPlan(store, source_image)
+    path = str(tmp_path / "drawing.svg")
+    size = source_image.shape[1::-1]
+    stats = vector_export.export_vector(path, plan, size, 2, (0, 255, 0), (0, 0, 0), sampled, merge, compact)
+
+    first, last, colors, new_path = vector_export.color_groups(plan, sampled, merge, (0, 255, 0))
+    with open(path) as f:
+        paths = parse_svg_paths(f.read())
+    assert len(paths) == stats["paths"] == new_path.sum()
+    assert [stroke for stroke, _ in paths] == [vector_export.hex_color(c) for c in colors[new_path].tolist()]
+
+    subpaths = [points for _, group in paths for points in group]
+    assert len(subpaths) == len(first)
+    for points, a, b in zip(subpaths, first, last):
+        assert np.array_equal(points, plan.points[a:b + 1])
@@ -0,0 +1,68 @@
+"""Plotter ordering and the travel it reports."""
+import math
+import re
+
+import numpy as np
+import pytest
+
+import vector_plot
+
+
+def random_contours(count, seed=0, size=200):
+    """Short random polylines as (N, 1, 2) int32 arrays."""
+    rng = np.random.default_rng(seed)
+    contours = []
+    for _ in range(count):
+        start = rng.integers(0, size, 2)
+        steps = rng.integers(-10, 11, (int(rng.integers(2, 8)), 2))
+        pts = np.clip(start + np.cumsum(steps, axis=0), 0, size - 1)
+        contours.append(pts.reshape(-1, 1, 2).astype(np.int32))
+    return contours
+
+
+def gcode_travel(path):
+    """Pen-up travel of a G-code file in its own units, starting and ending wherever the file does."""
+    pen, travel = (0.0, 0.0), 0.0
+    with open(path) as f:
+        for line in f:
+            m = re.match(r"G[01] X(\S+) Y(\S+)", line)
+            if m:
+                target = (float(m.group(1)), float(m.group(2)))
+                if line.startswith("G0"):
+                    travel += math.dist(pen, target)
+                pen = target
+    return travel
+
+
+def test_reported_travel_matches_gcode(tmp_path):
+    # Home is X0 Y0 after the Y flip: the bottom-left pixel, and the file ends there
+    contours = random_contours(60)
+    path = str(tmp_path / "plot.gcode")
+    stats = vector_plot.export_plot(path, contours, 200, scale=1.0, time_budget=0.5)
+    assert abs(gcode_travel(path) - stats["two_opt"][1]) < 1e-2
+
+
+def test_two_opt_never_lengthens_greedy_travel():
+    for seed in range(5):
+        contours = random_contours(80, seed)
+        order, flipped, stats = vector_plot.optimize(contours, home=(0, 200), time_budget=0.5)
+        assert stats["two_opt"][1] <= stats["greedy"][1] + 1e-9
+
+
+def test_every_stroke_drawn_once():
+    contours = random_contours(80, seed=3)
+    order, flipped, stats = vector_plot.optimize(contours, home=(0, 200), time_budget=0.5)
+    assert sorted(order) == list(range(len(contours)))
+    assert len(flipped) == len(order)
+    # Reordering and flipping only changes pen-up travel
+    assert stats["two_opt"][0] == pytest.approx(stats["original"][0])
+    strokes = list(vector_plot.ordered_strokes(contours, order, flipped))
+    for pts, i, flip in zip(strokes, order, flipped):
+        expected = contours[i].reshape(-1, 2)
+        assert np.array_equal(pts, expected[::-1] if flip else expected)
+
+
+def test_empty_and_single_contour():
+    assert vector_plot.greedy_order([]) == ([], [])
+    order, flipped, stats = vector_plot.optimize(random_contours(1), time_budget=0.1)
+    assert order == [0] and len(flipped) == 1
@@ -0,0 +1,63 @@
+"""FrameScheduler pacing: how many segments each frame draws and how long the rest will take."""
+import pytest
+
+from vector_core import FrameScheduler
+
+
+def test_fixed_steps():
+    scheduler = FrameScheduler()
+    scheduler.start(1000, 0, "fixed", 300)
+    assert [scheduler.next_steps(c) for c in (0, 300, 900, 1000)] == [300, 300, 100, 0]
+    # Per-segment cost before anything is measured, plus the overhead of each of the 4 frames
+    assert scheduler.expected_duration(0) == pytest.approx(1000 * 1e-6 + 4 * FrameScheduler.FIXED_FRAME_OVERHEAD)
+
+
+def test_paced_steps_follow_the_clock():
+    scheduler = FrameScheduler()
+    scheduler.start(1000, 0, "paced", duration=10.0, now=0.0)
+    assert scheduler.next_steps(0, now=1.0) == 100
+    assert scheduler.next_steps(100, now=1.0) == 0      # Ahead of the clock: wait
+    assert scheduler.next_steps(50, now=2.0) == 150     # Behind: catch up
+    assert scheduler.next_steps(0, now=60.0) == 1000    # Never past the end
+    assert scheduler.expected_duration(0) == pytest.approx(10.0)
+    assert scheduler.eta(now=4.0) == pytest.approx(6.0)
+
+
+def test_paced_resume_keeps_the_pace():
+    # Paused at segment 400 of a 10 s drawing: the rest takes its 6 s share
+    scheduler = FrameScheduler()
+    scheduler.start(1000, 400, "paced", duration=10.0, now=100.0)
+    assert scheduler.next_steps(400, now=101.0) == 100
+    assert scheduler.expected_duration(400) == pytest.approx(6.0)
+    assert scheduler.eta(now=100.0) == pytest.approx(6.0)
+
+
+def test_paced_without_duration_is_adaptive():
+    scheduler = FrameScheduler()
+    scheduler.start(1000, 0, "paced", duration=None)
+    assert scheduler.mode == "adaptive"
+    assert scheduler.eta() is None
+
+
+def test_adaptive_steps_fill_the_frame_budget():
+    scheduler = FrameScheduler(target_frame=0.01, work_fraction=0.5)
+    scheduler.start(10 ** 6, 0, "adaptive")
+    assert scheduler.next_steps(0) == FrameScheduler.INITIAL_STEPS
+
+    # 1 us per segment: the 5 ms budget holds 5000 segments, reached at most 4x per frame
+    scheduler.record(500, 500e-6)
+    assert scheduler.next_steps(0) == 2000
+    assert scheduler.next_steps(0) == 5000
+    assert scheduler.next_steps(0) == 5000
+    assert scheduler.expected_duration(0) == pytest.approx(10 ** 6 * 1e-6 / 0.5)
+
+    # Display refreshes come out of the same budget
+    scheduler.record(0, 0, display_seconds=0.01)
+    assert scheduler.next_steps(0) == 2000
+
+
+def test_adaptive_steps_near_the_end():
+    scheduler = FrameScheduler()
+    scheduler.start(1000, 0, "adaptive")
+    assert scheduler.next_steps(900) == 100
+    assert scheduler.expected_duration(1000) == scheduler.target_frame
@@ -0,0 +1,43 @@
+"""Session files must reopen exactly what was saved."""
+import numpy as np
+
+import vector_core
+import vector_session
+
+
+def test_session_round_trip(tmp_path, source_image, source_contours):
+    store = vector_core.ContourStore.from_contours(source_contours, "chain")
+    plan = vector_core.SegmentPlan(store, source_image)
+    cursor = len(plan) // 3
+    canvas = plan.draw(vector_core.new_canvas(source_image.shape, (0, 0, 0)), 0, cursor, 2, (0, 255, 0), True)
+    edges, _ = vector_core.extract_contours(source_image, 10, 60, 10)
+    params = {"thickness": 2, "sampled_color": True, "simplify": "chain", "bg_color": (0, 0, 0),
+              "line_color": (0, 255, 0)}
+    path = str(tmp_path / "drawing.vds")
+    vector_session.save_session(path, source_image, store, params, cursor, canvas, edges,
+                                meta={"source": "noise.png"}, plan=plan)
+
+    session = vector_session.load_session(path)
+    assert session["params"] == params
+    assert session["cursor"] == cursor
+    assert session["meta"] == {"source": "noise.png"}
+    for name, arr in (("input", source_image), ("canvas", canvas), ("edges", edges)):
+        assert np.array_equal(session[name], arr)
+    loaded = session["contours"]
+    assert np.array_equal(loaded.points, store.points) and np.array_equal(loaded.offsets, store.offsets)
+    assert (loaded.source_bytes, loaded.source_segments) == (store.source_bytes, store.source_segments)
+    for name, arr in plan.to_arrays().items():
+        assert np.array_equal(getattr(session["plan"], name), arr)
+
+    # Resuming the loaded drawing finishes it exactly like the original
+    expected = plan.draw(canvas.copy(), cursor, len(plan), 2, (0, 255, 0), True)
+    resumed = session["plan"].draw(session["canvas"], cursor, len(plan), 2, (0, 255, 0), True)
+    assert np.array_equal(resumed, expected)
+
+
+def test_session_without_plan(tmp_path, source_image, source_contours):
+    path = str(tmp_path / "bare.vds")
+    vector_session.save_session(path, source_image, source_contours, {"thickness": 1})
+    session = vector_session.load_session(path)
+    assert session["plan"] is None and session["canvas"] is None and session["edges"] is None
+    assert len(session["contours"]) == len(source_contours)
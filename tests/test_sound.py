@@ -0,0 +1,65 @@
+"""Sound clips must stay in step with the drawing however long they take to render."""
+import time
+import wave
+
+import numpy as np
+
+import vector_core
+import vector_sound
+
+RENDER_SECONDS = 0.3
+
+
+class FakeProcess:
+    """Stands in for the player process; remembers the WAV it was asked to play."""
+    played = []
+
+    def __init__(self, argv, **kwargs):
+        with wave.open(argv[-1], "rb") as f:
+            FakeProcess.played.append(f.getnframes())
+
+    def terminate(self):
+        pass
+
+
+def test_drift_ignores_render_time(monkeypatch):
+    monkeypatch.setattr(vector_sound, "find_player", lambda: ["fake-player"])
+    monkeypatch.setattr(vector_sound.subprocess, "Popen", FakeProcess)
+    render = vector_sound.render_sonification
+
+    def slow_render(*args, **kwargs):
+        time.sleep(RENDER_SECONDS)
+        return render(*args, **kwargs)
+    monkeypatch.setattr(vector_sound, "render_sonification", slow_render)
+
+    # 1000 segments over 10 s: the drawing advances 100 segments per second
+    xs = np.arange(1001)
+    contour = np.stack((xs % 100, xs // 10), axis=1).reshape(-1, 1, 2).astype(np.int32)
+    plan = vector_core.SegmentPlan([contour])
+    player = vector_sound.SoundPlayer()
+    FakeProcess.played = []
+    try:
+        requested = time.perf_counter()
+        player.play(plan, 100, 0, 10.0)
+        player.executor.submit(lambda: None).result()  # Wait for the render to start playback
+        now = time.perf_counter()
+        _, _, _, started = player.clip
+        assert started - requested < RENDER_SECONDS / 2
+
+        # The clip skips the render time instead of trailing the drawing by it
+        assert len(FakeProcess.played) == 1
+        assert FakeProcess.played[0] <= (10.0 - RENDER_SECONDS) * vector_sound.SAMPLE_RATE
+        on_pace = (now - requested) * 100
+        assert player.drift(on_pace, now) < 0.05
+        assert abs(player.drift(on_pace - 50, now) - 0.5) < 0.05
+        assert player.drift(0, started + 20) == 10.0  # Clamped to the end of the clip
+    finally:
+        player.close()
+
+
+def test_trim_start_fades_in():
+    samples = np.full(vector_sound.SAMPLE_RATE, 10000, dtype=np.int16)
+    trimmed = vector_sound.trim_start(samples, 0.5)
+    assert len(trimmed) == vector_sound.SAMPLE_RATE // 2
+    assert trimmed[0] == 0 and trimmed[-1] == 10000
+    assert np.array_equal(vector_sound.trim_start(samples, 0), samples)
@@ -0,0 +1,62 @@
+"""Splitting contours at tile seams and stitching the pieces back together."""
+import numpy as np
+
+import vector_tiles
+
+
+def line(*pts):
+    return np.array(pts, dtype=np.int32)
+
+
+def test_pieces_meeting_across_a_seam_are_joined():
+    left = line((5, 5), (9, 5))
+    right = line((15, 5), (10, 5))  # Drawn the other way
+    stitched = vector_tiles.stitch_pieces([left, right], tile_size=10)
+    assert len(stitched) == 1
+    assert stitched[0].tolist() == [[5, 5], [9, 5], [10, 5], [15, 5]]
+
+
+def test_pieces_in_the_same_tile_are_not_joined():
+    pieces = [line((1, 1), (4, 1)), line((5, 1), (8, 1))]
+    assert len(vector_tiles.stitch_pieces(pieces, tile_size=10)) == 2
+
+
+def test_endpoints_too_far_apart_are_not_joined():
+    gap = vector_tiles.SEAM_JOIN_DIST + 1
+    pieces = [line((5, 5), (9, 5)), line((9 + gap, 5), (15, 5))]
+    assert len(vector_tiles.stitch_pieces(pieces, tile_size=10)) == 2
+
+
+def test_loop_across_four_tiles_becomes_one_chain():
+    # A square around the corner shared by four 10 px tiles, cut at each seam
+    pieces = [
+        line((10, 5), (15, 5), (15, 9)),
+        line((15, 10), (15, 15), (10, 15)),
+        line((9, 15), (5, 15), (5, 10)),
+        line((5, 9), (5, 5), (9, 5)),
+    ]
+    stitched = vector_tiles.stitch_pieces(pieces, tile_size=10)
+    assert len(stitched) == 1
+    assert len(stitched[0]) == sum(len(p) for p in pieces)
+
+
+def test_open_chains_come_before_loops():
+    loop = [line((10, 5), (15, 5), (15, 9)), line((15, 10), (15, 15), (10, 15)),
+            line((9, 15), (5, 15), (5, 10)), line((5, 9), (5, 5), (9, 5))]
+    chain = [line((25, 25), (29, 25)), line((30, 25), (35, 25))]
+    stitched = vector_tiles.stitch_pieces(loop + chain, tile_size=10)
+    assert [len(s) for s in stitched] == [4, 12]
+
+
+def test_split_at_seams_cuts_along_interior_seams():
+    # Rectangle whose right edge lies on the seam of tile (0, 0, 10, 10) in a 20x20 image
+    rect = line((2, 2), (9, 2), (9, 6), (2, 6))
+    pieces, touched = vector_tiles.split_at_seams(rect, (0, 0, 10, 10), 20, 20)
+    assert touched
+    assert [p.tolist() for p in pieces] == [[[9, 6], [2, 6], [2, 2], [9, 2]]]
+
+
+def test_split_at_seams_leaves_image_borders_alone():
+    rect = line((0, 0), (9, 0), (9, 6), (0, 6))
+    pieces, touched = vector_tiles.split_at_seams(rect, (0, 0, 10, 10), 10, 10)
+    assert not touched and pieces[0] is rect
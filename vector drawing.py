@@ -1,18 +1,22 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 import numpy as np
 from tkinter import *
 from tkinter import filedialog, messagebox
 from PIL import Image, ImageTk
 
-# --- ADDED ---
-# Try to import winsound for audio. This is Windows-only.
-try:
-    import winsound
-    SOUND_ENABLED = True
-except ImportError:
-    SOUND_ENABLED = False
-    print("Warning: 'winsound' module not found. Sound will be disabled. (This is expected on non-Windows systems)")
-# --- END ADDED ---
+import vector_animate
+import vector_core
+import vector_export
+import vector_plot
+import vector_raster
+import vector_session
+import vector_sound
+import vector_view
+from vector_trace import TRACER, RateMeter
 
 
 class VectorDrawingApp:
@@ -22,28 +26,68 @@ class VectorDrawingApp:
         self.root.geometry("1600x900") # Increased size for new controls
 
         # --- Constants ---
-        self.IMG_SIZE = (700, 700) # Increased image size
+        self.IMG_SIZE = vector_core.IMG_SIZE # Increased image size
+        self.DISPLAY_FPS = 30 # Cap for canvas refreshes while drawing
+        self.PREVIEW_DEBOUNCE_MS = 300 # Wait this long after typing before a live preview
+        self.EDGE_POLL_MS = 15 # How often the main loop checks for a finished edge job
+        self.EXPORT_POLL_MS = 200 # How often the main loop checks on a background export
+        self.PLOT_OPT_TIME = 1.0 # Seconds of 2-opt when exporting from the GUI
+        self.SOUND_RESYNC_SECONDS = 0.25 # Restart the sound clip when it drifts this far from the drawing
+        self.ZOOM_STEP = 1.25 # Zoom factor per mouse-wheel notch
 
         # --- Application State Variables ---
         self.input_img = None
+        self.input_hash = None # Content hash of input_img, for the pipeline cache
+        self.pipeline_cache = vector_core.PipelineCache()
         self.vector_img = None
         self.edges_mask_bgr = None # To store the preview
-        self.contours = []
+        self.contours = [] # A vector_core.ContourStore once edges are processed
+        self.plan = vector_core.SegmentPlan([]) # Flat segment table built from self.contours
         self.drawing = False
-        self.current_contour = 0
-        self.current_point = 0
+        self.cursor = 0 # Index of the next segment in self.plan to draw
         self.animation_id = None
 
+        # --- Display State ---
+        self.vector_photo = None # Persistent Tk photo for the vector canvas
+        self.dirty_rect = None # (x0, y0, x1, y1) of canvas pixels not yet shown
+        self.viewport = vector_view.Viewport(self.IMG_SIZE) # Zoom and pan of the vector view
+        self.vector_pyramid = None # Multi-resolution copies of vector_img, updated as it is drawn
+        self.edge_pyramid = None # Same for edges_mask_bgr, built when the preview is first shown
+        self.pan_anchor = None # Last pointer position while dragging the view
+        self.last_display_time = 0.0
+        self.rate_meter = RateMeter() # Live draw frames/s and segments/s
+        self.scheduler = vector_core.FrameScheduler() # Sizes each draw_step frame
+        self.rasterizer = vector_raster.TiledRasterizer() # Parallel tiles for big draws, inline for small ones
+
+        # --- Background Edge Processing ---
+        # A single worker keeps the pipeline cache single-threaded; OpenCV releases the GIL
+        self.edge_executor = ThreadPoolExecutor(max_workers=1)
+        self.edge_future = None
+        self.edge_job_id = 0 # Bumped per request so stale results are dropped
+        self.preview_after_id = None
+
+        # --- Background Video Export ---
+        self.export_executor = ThreadPoolExecutor(max_workers=1)
+        self.export_future = None
+
+        # --- Sound ---
+        self.sound = vector_sound.SoundPlayer() # Pre-rendered clips, played asynchronously
+
         # --- Mode & Style Variables ---
         self.bg_color = (0, 0, 0) # Black
         self.line_color = (0, 255, 0) # Green
         self.use_color_sampling = BooleanVar()
         self.show_edge_preview = BooleanVar()
         self.sound_enabled_var = BooleanVar(value=True) # --- ADDED ---
+        self.trace_enabled = BooleanVar()
+        self.auto_speed = BooleanVar() # Size frames from measured cost instead of the Speed entry
+        self.simplify_mode = StringVar(value="none") # One of vector_core.SIMPLIFY_MODES
+        self.antialias = BooleanVar()
 
         # --- UI Setup ---
         self.setup_ui()
         self.update_status("Welcome! Please load an image to begin.")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def setup_ui(self):
         # --- Top Control Frame ---
@@ -68,6 +112,20 @@ class VectorDrawingApp:
         self.save_button = Button(button_frame, text="Save Output", command=self.save_image, state=DISABLED)
         self.save_button.grid(row=0, column=4, padx=5)
 
+        self.plot_button = Button(button_frame, text="Export Plot", command=self.export_plot, state=DISABLED)
+        self.plot_button.grid(row=0, column=5, padx=5)
+
+        self.sound_button = Button(button_frame, text="Export Sound", command=self.export_sound, state=DISABLED)
+        self.sound_button.grid(row=0, column=6, padx=5)
+
+        self.video_button = Button(button_frame, text="Export Video", command=self.export_video, state=DISABLED)
+        self.video_button.grid(row=0, column=7, padx=5)
+
+        self.session_button = Button(button_frame, text="Save Session", command=self.save_session, state=DISABLED)
+        self.session_button.grid(row=0, column=8, padx=5)
+
+        Button(button_frame, text="Open Session", command=self.open_session).grid(row=0, column=9, padx=5)
+
         # --- Slider Sub-Frame (NOW ENTRY WIDGETS) ---
         slider_frame = Frame(control_frame)
         slider_frame.pack(pady=5)
@@ -97,6 +155,28 @@ class VectorDrawingApp:
         self.speed_scale.insert(0, "500") # MODIFIED
         self.speed_scale.grid(row=0, column=9, sticky=W, padx=(2,10))
 
+        Label(slider_frame, text="Finish In (s):").grid(row=0, column=10, sticky=E, padx=(5,0))
+        self.finish_in = Entry(slider_frame, width=8) # 0 = not paced
+        self.finish_in.insert(0, "0")
+        self.finish_in.grid(row=0, column=11, sticky=W, padx=(2,10))
+
+        Label(slider_frame, text="Simplify:").grid(row=1, column=0, sticky=E, padx=(5,0), pady=(5,0))
+        OptionMenu(slider_frame, self.simplify_mode, *vector_core.SIMPLIFY_MODES).grid(row=1, column=1, sticky=W, padx=(2,10), pady=(5,0))
+
+        Label(slider_frame, text="Tolerance:").grid(row=1, column=2, sticky=E, padx=(5,0), pady=(5,0))
+        self.simplify_tolerance = Entry(slider_frame, width=8) # approxPolyDP epsilon in pixels
+        self.simplify_tolerance.insert(0, str(vector_core.DEFAULT_SIMPLIFY_TOLERANCE))
+        self.simplify_tolerance.grid(row=1, column=3, sticky=W, padx=(2,10), pady=(5,0))
+
+        Label(slider_frame, text="Supersample:").grid(row=1, column=4, sticky=E, padx=(5,0), pady=(5,0))
+        self.supersample = Entry(slider_frame, width=8) # 1 = off, k = draw at k x resolution
+        self.supersample.insert(0, "1")
+        self.supersample.grid(row=1, column=5, sticky=W, padx=(2,10), pady=(5,0))
+
+        # Live edge preview while typing edge parameters
+        for entry in (self.canny_low, self.canny_high, self.min_contour_len):
+            entry.bind("<KeyRelease>", self.schedule_edge_preview)
+
         # --- Mode Sub-Frame ---
         mode_frame = Frame(control_frame)
         mode_frame.pack(pady=5)
@@ -113,15 +193,20 @@ class VectorDrawingApp:
         self.edge_preview_check.grid(row=0, column=3, padx=10)
 
         # --- ADDED ---
-        self.sound_check = Checkbutton(mode_frame, text="Enable Sound", variable=self.sound_enabled_var)
+        self.sound_check = Checkbutton(mode_frame, text="Enable Sound", variable=self.sound_enabled_var, command=self.toggle_sound)
         self.sound_check.grid(row=0, column=4, padx=10)
         
-        # Disable sound checkbox if module failed to import
-        if not SOUND_ENABLED:
+        # Disable sound checkbox if there is no audio player (WAV export still works)
+        if not self.sound.available:
             self.sound_enabled_var.set(False)
-            self.sound_check.config(state=DISABLED, text="Sound (Windows Only)")
+            self.sound_check.config(state=DISABLED, text="Sound (No Player)")
         # --- END ADDED ---
 
+        Checkbutton(mode_frame, text="Auto Speed", variable=self.auto_speed).grid(row=0, column=7, padx=10)
+        Checkbutton(mode_frame, text="Anti-alias", variable=self.antialias).grid(row=0, column=8, padx=10)
+        Checkbutton(mode_frame, text="Trace", variable=self.trace_enabled, command=self.toggle_trace).grid(row=0, column=5, padx=10)
+        Button(mode_frame, text="Export Trace", command=self.export_trace).grid(row=0, column=6, padx=10)
+
         # --- Image Display Frame ---
         image_frame = Frame(self.root)
         image_frame.pack(fill=BOTH, expand=True, padx=20, pady=10)
@@ -132,6 +217,14 @@ class VectorDrawingApp:
         self.vector_label = Label(image_frame, text="Vector Output", bg="gray10")
         self.vector_label.pack(side=RIGHT, padx=10, fill=BOTH, expand=True)
 
+        # Wheel zooms around the pointer, dragging pans, double-click fits the whole canvas
+        self.vector_label.bind("<MouseWheel>", self.on_zoom) # Windows and macOS
+        self.vector_label.bind("<Button-4>", self.on_zoom) # X11 wheel up
+        self.vector_label.bind("<Button-5>", self.on_zoom) # X11 wheel down
+        self.vector_label.bind("<ButtonPress-1>", self.start_pan)
+        self.vector_label.bind("<B1-Motion>", self.on_pan)
+        self.vector_label.bind("<Double-Button-1>", self.reset_zoom)
+
         # --- Status Bar ---
         self.status_label = Label(self.root, text="", bd=1, relief=SUNKEN, anchor=W)
         self.status_label.pack(side=BOTTOM, fill=X)
@@ -140,7 +233,7 @@ class VectorDrawingApp:
         self.reset_drawing() # Initialize vector_img
         placeholder = np.full((self.IMG_SIZE[1], self.IMG_SIZE[0], 3), 230, dtype=np.uint8) # Light gray
         self.display_image(placeholder, self.original_label)
-        self.display_image(self.vector_img, self.vector_label)
+        self.show_vector_canvas()
 
     # --- NEW HELPER FUNCTION ---
     def get_int_from_entry(self, entry_widget, default_value, min_val=None):
@@ -163,6 +256,20 @@ class VectorDrawingApp:
             return default_value
     # --- END NEW HELPER FUNCTION ---
 
+    def update_rasterizer(self):
+        """Applies the Anti-alias and Supersample settings to the rasterizer."""
+        self.rasterizer.line_type = cv2.LINE_AA if self.antialias.get() else cv2.LINE_8
+        self.rasterizer.supersample = self.get_int_from_entry(self.supersample, 1, min_val=1)
+
+    def get_tolerance(self):
+        """Reads the simplification tolerance, falling back to the default on bad input."""
+        try:
+            return max(0.0, float(self.simplify_tolerance.get()))
+        except ValueError:
+            self.simplify_tolerance.delete(0, END)
+            self.simplify_tolerance.insert(0, str(vector_core.DEFAULT_SIMPLIFY_TOLERANCE))
+            return vector_core.DEFAULT_SIMPLIFY_TOLERANCE
+
     def update_status(self, message):
         """Updates the text in the bottom status bar."""
         self.status_label.config(text=message)
@@ -179,54 +286,132 @@ class VectorDrawingApp:
             return
 
         self.input_img = cv2.resize(img, self.IMG_SIZE)
+        self.input_hash = vector_core.image_hash(self.input_img)
         self.update_status(f"Loaded {path.split('/')[-1]}")
 
         self.process_edges()
 
         self.display_image(self.input_img, self.original_label)
 
-        # Enable buttons
-        self.start_pause_button.config(state=NORMAL)
+        # Enable buttons (Start/Finish are enabled once the edge job delivers)
         self.save_button.config(state=NORMAL)
+        self.plot_button.config(state=NORMAL)
+        self.sound_button.config(state=NORMAL)
+        self.video_button.config(state=NORMAL)
+        self.session_button.config(state=NORMAL)
         self.reset_button.config(state=NORMAL)
         self.reprocess_button.config(state=NORMAL)
-        self.finish_now_button.config(state=NORMAL)
         self.bg_toggle_button.config(state=NORMAL)
 
     def process_edges(self):
-        """Finds contours and (if checked) displays the edge preview."""
+        """Starts contour extraction on the worker thread; poll_edge_job applies the result."""
         if self.input_img is None:
             return
             
         self.reset_drawing()
 
-        gray = cv2.cvtColor(self.input_img, cv2.COLOR_BGR2GRAY)
-
         # MODIFIED: Get values from Entry widgets safely
-        low_thresh = self.get_int_from_entry(self.canny_low, 10, min_val=0)
-        high_thresh = self.get_int_from_entry(self.canny_high, 60, min_val=0)
-        min_len = self.get_int_from_entry(self.min_contour_len, 10, min_val=2)
+        # (read here: Tk widgets must only be touched from the main thread)
+        low_thresh = self.get_int_from_entry(self.canny_low, vector_core.DEFAULT_CANNY_LOW, min_val=0)
+        high_thresh = self.get_int_from_entry(self.canny_high, vector_core.DEFAULT_CANNY_HIGH, min_val=0)
+        min_len = self.get_int_from_entry(self.min_contour_len, vector_core.DEFAULT_MIN_CONTOUR, min_val=2)
+        tolerance = self.get_tolerance()
+
+        # Anything still queued is stale now; a job already running is ignored when it lands
+        if self.edge_future is not None:
+            self.edge_future.cancel()
+        self.edge_job_id += 1
+        self.edge_future = self.edge_executor.submit(self.compute_edges, self.input_img, self.input_hash,
+                                                     low_thresh, high_thresh, min_len,
+                                                     self.simplify_mode.get(), tolerance)
 
-        edges = cv2.Canny(gray, low_thresh, high_thresh)
-        edges = cv2.dilate(edges, None)
-        self.edges_mask_bgr = cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR)
+        self.start_pause_button.config(state=DISABLED)
+        self.finish_now_button.config(state=DISABLED)
+        self.update_status("Processing edges...")
+        self.root.after(self.EDGE_POLL_MS, self.poll_edge_job, self.edge_job_id, self.edge_future, min_len)
+
+    def compute_edges(self, img, img_hash, low_thresh, high_thresh, min_len, simplify, tolerance):
+        """Worker thread: runs the cached edge pipeline, packs the contours and compiles the segment plan."""
+        with TRACER.span("process_edges", low=low_thresh, high=high_thresh, min_len=min_len):
+            edges, contours = self.pipeline_cache.extract_contours(img, low_thresh, high_thresh, min_len,
+                                                                   img_hash=img_hash)
+            store = vector_core.ContourStore.from_contours(contours, simplify, tolerance)
+            edges_mask_bgr = cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR)
+            return edges_mask_bgr, store, vector_core.SegmentPlan(store, img)
+
+    def poll_edge_job(self, job_id, future, min_len):
+        """Main thread: waits for an edge job via root.after and applies it if still current."""
+        if job_id != self.edge_job_id:
+            return # Superseded by a newer request
+
+        if not future.done():
+            self.root.after(self.EDGE_POLL_MS, self.poll_edge_job, job_id, future, min_len)
+            return
 
-        cnts, _ = cv2.findContours(edges, cv2.RETR_LIST, cv2.CHAIN_APPROX_NONE)
-        
-        # Filter contours by length
-        filtered_cnts = [c for c in cnts if len(c) >= min_len]
-        
-        self.contours = sorted(filtered_cnts, key=cv2.contourArea, reverse=True)
-        
-        self.update_status(f"Found {len(self.contours)} contours (min length {min_len}).")
+        self.edge_future = None
+        try:
+            self.edges_mask_bgr, self.contours, self.plan = future.result()
+        except Exception as e:
+            self.update_status("Edge processing failed.")
+            messagebox.showerror("Edge Error", f"Error processing edges: {e}")
+            return
+        self.edge_pyramid = None
+
+        self.reset_drawing()
+        self.update_status(f"Found {len(self.contours)} contours (min length {min_len}), "
+                           f"{self.contours.report()}. [{self.pipeline_cache.stats_text()}]")
         self.update_vector_display()
 
+    def edges_pending(self):
+        """True while an edge job is queued or running."""
+        return self.edge_future is not None and not self.edge_future.done()
+
+    def schedule_edge_preview(self, event=None):
+        """Debounces typing in the edge entries before refreshing the live preview."""
+        if self.preview_after_id:
+            self.root.after_cancel(self.preview_after_id)
+        self.preview_after_id = self.root.after(self.PREVIEW_DEBOUNCE_MS, self.live_edge_preview)
+
+    def live_edge_preview(self):
+        """Reprocesses edges for the preview, unless drawing or an entry is half-typed."""
+        self.preview_after_id = None
+        if self.input_img is None or self.drawing or not self.show_edge_preview.get():
+            return
+
+        # Don't let get_int_from_entry reset a value the user is still typing
+        for entry in (self.canny_low, self.canny_high, self.min_contour_len):
+            try:
+                int(entry.get())
+            except ValueError:
+                return
+
+        self.process_edges()
+
+    def on_close(self):
+        """Offers to save an unfinished drawing, drops pending edge jobs and closes the window."""
+        if self.drawing:
+            self.pause_drawing()
+        self.stop_drawing()
+        if self.input_img is not None and 0 < self.cursor < len(self.plan) and not self.edges_pending():
+            answer = messagebox.askyesnocancel("Save Session",
+                                               "Save this unfinished drawing as a session to resume later?")
+            if answer is None:
+                return
+            if answer and not self.save_session():
+                return
+        self.edge_job_id += 1
+        self.edge_executor.shutdown(wait=False, cancel_futures=True)
+        self.export_executor.shutdown(wait=False, cancel_futures=True)
+        self.rasterizer.close()
+        self.sound.close()
+        self.root.destroy()
+
     def update_vector_display(self):
         """Shows either the edge preview or the vector canvas."""
         if self.show_edge_preview.get() and self.edges_mask_bgr is not None:
-            self.display_image(self.edges_mask_bgr, self.vector_label)
+            self.render_view()
         else:
-            self.display_image(self.vector_img, self.vector_label)
+            self.show_vector_canvas()
 
     def toggle_background(self):
         """Toggles the background and line color, then resets."""
@@ -241,6 +426,9 @@ class VectorDrawingApp:
         self.process_edges() # Re-process and reset
 
     def start_drawing(self):
+        if self.edges_pending():
+            return
+
         if not self.contours:
             messagebox.showwarning("No Contours", "No contours found. Try adjusting Canny values and 'Reprocess Edges'.")
             return
@@ -254,6 +442,10 @@ class VectorDrawingApp:
             self.update_vector_display()
 
         self.drawing = True
+        self.rate_meter.reset()
+        self.update_rasterizer()
+        self.start_scheduler()
+        self.start_sound()
         self.start_pause_button.config(text="Pause", command=self.pause_drawing)
         self.reset_button.config(state=DISABLED)
         self.reprocess_button.config(state=DISABLED)
@@ -261,17 +453,58 @@ class VectorDrawingApp:
         
         self.draw_step()
 
+    def start_scheduler(self):
+        """Picks the frame pacing mode: Finish In > 0, else Auto Speed, else the Speed entry."""
+        finish_in = self.get_int_from_entry(self.finish_in, 0, min_val=0)
+        steps = self.get_int_from_entry(self.speed_scale, 500, min_val=1)
+        if finish_in > 0:
+            mode = "paced"
+        elif self.auto_speed.get():
+            mode = "adaptive"
+        else:
+            mode = "fixed"
+        self.scheduler.start(len(self.plan), self.cursor, mode, steps, duration=finish_in)
+
+    def start_sound(self):
+        """Plays the sonification of the rest of the drawing, timed to the expected draw time."""
+        if self.sound_enabled_var.get() and self.sound.available:
+            self.sound.play(self.plan, self.vector_img.shape[0], self.cursor,
+                            self.scheduler.expected_duration(self.cursor))
+
+    def toggle_sound(self):
+        if not self.drawing:
+            return
+        if self.sound_enabled_var.get():
+            self.start_sound()
+        else:
+            self.sound.stop()
+
+    def sync_sound(self):
+        """Restarts the clip from the cursor, at the measured draw rate, if it has drifted."""
+        if self.sound.clip is None or self.sound.drift(self.cursor) < self.SOUND_RESYNC_SECONDS:
+            return
+        _, segments_per_s = self.rate_meter.rates()
+        remaining = len(self.plan) - self.cursor
+        if segments_per_s > 0 and self.scheduler.mode != "paced":
+            duration = remaining / segments_per_s
+        else:
+            duration = self.scheduler.expected_duration(self.cursor)
+        self.sound.play(self.plan, self.vector_img.shape[0], self.cursor, duration)
+
     def pause_drawing(self):
         self.drawing = False
         self.stop_drawing() # Stops the 'after' loop
+        self.refresh_dirty_region() # Show anything drawn since the last refresh
         self.start_pause_button.config(text="Resume", command=self.start_drawing)
         self.reset_button.config(state=NORMAL)
         self.reprocess_button.config(state=NORMAL)
-        self.update_status(f"Paused at contour {self.current_contour} of {len(self.contours)}.")
+        current_contour, _ = self.plan.locate(self.cursor)
+        self.update_status(f"Paused at contour {current_contour} of {len(self.contours)}.")
 
     def stop_drawing(self):
         """Stops the 'after' loop completely."""
         self.drawing = False
+        self.sound.stop()
         if self.animation_id:
             self.root.after_cancel(self.animation_id)
             self.animation_id = None
@@ -280,15 +513,14 @@ class VectorDrawingApp:
         """Stops drawing and clears the vector canvas to the BG color."""
         self.stop_drawing()
         
-        self.current_contour = 0
-        self.current_point = 0
+        self.cursor = 0
         
         if self.input_img is not None:
             self.vector_img = np.full_like(self.input_img, self.bg_color, dtype=np.uint8)
         else:
             self.vector_img = np.full((self.IMG_SIZE[1], self.IMG_SIZE[0], 3), self.bg_color, dtype=np.uint8)
 
-        self.display_image(self.vector_img, self.vector_label)
+        self.show_vector_canvas()
         
         self.start_pause_button.config(text="Start Drawing", command=self.start_drawing)
         if self.input_img is None:
@@ -307,7 +539,7 @@ class VectorDrawingApp:
 
     def finish_now(self):
         """Instantly draws all remaining contours."""
-        if not self.contours:
+        if not self.contours or self.edges_pending():
             return
             
         self.stop_drawing()
@@ -315,63 +547,28 @@ class VectorDrawingApp:
 
         # Get settings *once*
         # MODIFIED: Get values from Entry widgets safely
-        thickness = self.get_int_from_entry(self.line_thickness, 1, min_val=1)
+        thickness = self.get_int_from_entry(self.line_thickness, vector_core.DEFAULT_LINE_THICKNESS, min_val=1)
         use_sampling = self.use_color_sampling.get()
-        default_color = self.line_color
-        
-        # Loop from the current contour to the end
-        for i in range(self.current_contour, len(self.contours)):
-            pts = self.contours[i]
-            
-            # Start from current_point if it's the current contour, else start from 0
-            start_pt = self.current_point if i == self.current_contour else 0
-            
-            for j in range(start_pt, len(pts) - 1):
-                x1, y1 = pts[j][0]
-                x2, y2 = pts[j + 1][0]
-                
-                if use_sampling:
-                    # Sample color from midpoint
-                    mx, my = (x1 + x2) // 2, (y1 + y2) // 2
-                    color = self.input_img[my, mx]
-                    color = (int(color[0]), int(color[1]), int(color[2]))
-                else:
-                    color = default_color
-                
-                cv2.line(self.vector_img, (x1, y1), (x2, y2), color, thickness)
+
+        # Draw from the current position to the end, across all cores
+        self.update_rasterizer()
+        self.rasterizer.draw(self.plan, self.vector_img, self.cursor, len(self.plan), thickness, self.line_color,
+                             use_sampling)
         
         # Mark as done
-        self.current_contour = len(self.contours)
-        self.current_point = 0
+        self.cursor = len(self.plan)
         
-        self.display_image(self.vector_img, self.vector_label)
+        self.show_vector_canvas()
         self.pause_drawing()
         self.start_pause_button.config(state=DISABLED)
         self.finish_now_button.config(state=DISABLED)
         self.update_status("Drawing complete.")
 
-    # --- ADDED ---
-    def map_y_to_freq(self, y):
-        """Maps a y-coordinate (0=top) to a sound frequency."""
-        min_freq = 300  # A low-ish note
-        max_freq = 2000 # A high-ish note
-        img_height = self.IMG_SIZE[1]
-        
-        # Normalize y from 0 (top) to 1 (bottom)
-        percent_y = max(0, min(1, y / img_height))
-        
-        # Invert so 0 (top) = max_freq and 1 (bottom) = min_freq
-        freq_range = max_freq - min_freq
-        frequency = max_freq - (percent_y * freq_range)
-        
-        return int(frequency)
-    # --- END ADDED ---
-
     def draw_step(self):
         if not self.drawing:
             return
 
-        if self.current_contour >= len(self.contours):
+        if self.cursor >= len(self.plan):
             print("Drawing complete.")
             self.pause_drawing() 
             self.start_pause_button.config(state=DISABLED)
@@ -379,75 +576,71 @@ class VectorDrawingApp:
             self.update_status("Drawing complete.")
             return
 
-        # --- MODIFIED ---
-        # Sound logic: Play a short beep based on the *current* Y position
-        # This runs once per frame (i.e., once per call to draw_step)
-        if SOUND_ENABLED and self.sound_enabled_var.get():
-            try:
-                # Get the y-coord of the *next* point to be drawn
-                pts = self.contours[self.current_contour]
-                if len(pts) > 0 and self.current_point < len(pts):
-                    y_coord = pts[self.current_point][0][1]
-                    freq = self.map_y_to_freq(y_coord)
-                    # This is a *blocking* call, so duration must be short.
-                    # 15ms will slightly slow the max framerate, creating the sound.
-                    winsound.Beep(freq, 15) 
-            except Exception as e:
-                pass # Ignore sound errors (e.g., index out of bounds)
-        # --- END MODIFIED ---
+        # Sound is a pre-rendered clip started in start_drawing; nothing to do per frame
+        frame_start = time.perf_counter()
 
         # Get settings from sliders
         # MODIFIED: Get values from Entry widgets safely
-        steps_per_frame = self.get_int_from_entry(self.speed_scale, 500, min_val=1)
         thickness = self.get_int_from_entry(self.line_thickness, 1, min_val=1)
         use_sampling = self.use_color_sampling.get()
-        default_color = self.line_color
-
-        # Update status bar only when the contour changes
-        contour_changed = False
-
-        for _ in range(steps_per_frame):
-            if self.current_contour >= len(self.contours):
-                break 
-
-            pts = self.contours[self.current_contour]
-
-            # We already pre-filtered, but good to keep a basic check
-            if len(pts) < 2:
-                self.current_contour += 1
-                self.current_point = 0
-                contour_changed = True
-                continue 
-
-            if self.current_point >= len(pts) - 1:
-                self.current_contour += 1
-                self.current_point = 0
-                contour_changed = True
-                continue 
-
-            # Get points for the line segment
-            x1, y1 = pts[self.current_point][0]
-            x2, y2 = pts[self.current_point + 1][0]
-
-            # --- Main Drawing Logic ---
-            if use_sampling:
-                # Sample color from midpoint (y, x for numpy)
-                mx, my = (x1 + x2) // 2, (y1 + y2) // 2
-                color = self.input_img[my, mx]
-                # Convert numpy.uint8 to Python int tuple
-                color = (int(color[0]), int(color[1]), int(color[2]))
-            else:
-                color = default_color
 
-            cv2.line(self.vector_img, (x1, y1), (x2, y2), color, thickness)
-            self.current_point += 1
-        
-        if contour_changed and len(self.contours) > 0 and self.current_contour < len(self.contours):
-            percent_done = (self.current_contour / len(self.contours)) * 100
-            self.update_status(f"Drawing... {percent_done:.0f}% (Contour {self.current_contour}/{len(self.contours)})")
+        # Draw this frame's slice of the segment table in one go; the scheduler sizes it
+        start = self.cursor
+        stop = start + self.scheduler.next_steps(start)
+        self.rasterizer.draw(self.plan, self.vector_img, start, stop, thickness, self.line_color, use_sampling)
+        self.cursor = stop
+        draw_time = time.perf_counter() - frame_start
+        self.rate_meter.tick(stop - start)
+
+        bbox = self.plan.bbox(start, stop)
+        if bbox is not None:
+            self.mark_dirty(*bbox, pad=thickness + 1) # +1 for anti-aliased edges
+
+        # Drawing runs every tick; the display only refreshes at DISPLAY_FPS
+        now = time.perf_counter()
+        display_time = None
+        if now - self.last_display_time >= 1.0 / self.DISPLAY_FPS:
+            self.refresh_dirty_region()
+            self.update_drawing_status()
+            self.sync_sound()
+            self.last_display_time = now
+            display_time = time.perf_counter() - now
+        self.scheduler.record(stop - start, draw_time, display_time)
+
+        if TRACER.enabled:
+            TRACER.add_complete("draw_step", frame_start, time.perf_counter() - frame_start,
+                                {"segments": stop - start})
+        self.animation_id = self.root.after(self.scheduler.delay_ms(frame_start), self.draw_step)
+
+    def update_drawing_status(self):
+        """Shows progress plus live frame and segment rates in the status bar."""
+        current_contour, _ = self.plan.locate(self.cursor)
+        percent_done = self.plan.progress(self.cursor) * 100
+        fps, segments_per_s = self.rate_meter.rates()
+        eta = self.scheduler.eta()
+        eta_text = f" | {eta:.1f} s left" if eta is not None else ""
+        self.update_status(f"Drawing... {percent_done:.0f}% (Contour {current_contour}/{len(self.contours)}) "
+                           f"| {fps:.0f} fps, {segments_per_s:,.0f} segments/s{eta_text}")
+        TRACER.counter("animation", fps=fps, segments_per_s=segments_per_s)
+
+    def toggle_trace(self):
+        """Turns span recording on or off."""
+        TRACER.enabled = self.trace_enabled.get()
+        self.update_status(f"Tracing {'on' if TRACER.enabled else 'off'} ({len(TRACER.events)} events recorded).")
+
+    def export_trace(self):
+        """Saves recorded spans as a Chrome trace (chrome://tracing or Perfetto)."""
+        if not TRACER.events:
+            messagebox.showwarning("No Trace", "Nothing recorded yet. Tick 'Trace' and run the app first.")
+            return
 
-        self.display_image(self.vector_img, self.vector_label)
-        self.animation_id = self.root.after(1, self.draw_step)
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Chrome Trace", "*.json")])
+        if path:
+            try:
+                TRACER.export(path)
+                self.update_status(f"Trace with {len(TRACER.events)} events saved to {path}")
+            except Exception as e:
+                messagebox.showerror("Save Error", f"Error saving trace: {e}")
 
     def save_image(self):
         if self.vector_img is None:
@@ -455,13 +648,330 @@ class VectorDrawingApp:
             return
             
         path = filedialog.asksaveasfilename(defaultextension=".png", 
-                                            filetypes=[("PNG Image", "*.png"), ("JPEG Image", "*.jpg")])
-        if path:
-            try:
-                cv2.imwrite(path, self.vector_img)
-                self.update_status(f"Image saved to {path}")
-            except Exception as e:
-                messagebox.showerror("Save Error", f"Error saving image: {e}")
+                                            filetypes=[("PNG Image", "*.png"), ("JPEG Image", "*.jpg"),
+                                                       ("SVG Vector", "*.svg"), ("PDF Vector", "*.pdf")])
+        if not path:
+            return
+
+        if os.path.splitext(path)[1].lower() in vector_export.FORMATS:
+            self.save_vector(path)
+            return
+        try:
+            cv2.imwrite(path, self.vector_img)
+            self.update_status(f"Image saved to {path}")
+        except Exception as e:
+            messagebox.showerror("Save Error", f"Error saving image: {e}")
+
+    def save_vector(self, path):
+        """Writes the whole drawing as SVG/PDF paths with the current thickness, colors and Simplify setting."""
+        if not self.contours or self.edges_pending():
+            messagebox.showwarning("No Contours", "There are no contours to export.")
+            return
+
+        thickness = self.get_int_from_entry(self.line_thickness, vector_core.DEFAULT_LINE_THICKNESS, min_val=1)
+        try:
+            stats = vector_export.export_vector(path, self.plan, self.vector_img.shape[1::-1], thickness,
+                                                self.line_color, self.bg_color, self.use_color_sampling.get())
+        except Exception as e:
+            messagebox.showerror("Save Error", f"Error saving vector file: {e}")
+            return
+        self.update_status(f"Vector file saved to {path}: {vector_export.format_stats(stats)}")
+
+    def session_params(self):
+        """Every setting needed to resume: the pipeline parameters plus the GUI-only ones."""
+        return {
+            "canny_low": self.get_int_from_entry(self.canny_low, vector_core.DEFAULT_CANNY_LOW, min_val=0),
+            "canny_high": self.get_int_from_entry(self.canny_high, vector_core.DEFAULT_CANNY_HIGH, min_val=0),
+            "min_contour": self.get_int_from_entry(self.min_contour_len, vector_core.DEFAULT_MIN_CONTOUR, min_val=2),
+            "thickness": self.get_int_from_entry(self.line_thickness, vector_core.DEFAULT_LINE_THICKNESS, min_val=1),
+            "sampled_color": self.use_color_sampling.get(),
+            "antialias": self.antialias.get(),
+            "supersample": self.get_int_from_entry(self.supersample, 1, min_val=1),
+            "simplify": self.simplify_mode.get(),
+            "tolerance": self.get_tolerance(),
+            "bg_color": self.bg_color,
+            "line_color": self.line_color,
+            "speed": self.get_int_from_entry(self.speed_scale, 500, min_val=1),
+            "finish_in": self.get_int_from_entry(self.finish_in, 0, min_val=0),
+            "auto_speed": self.auto_speed.get(),
+        }
+
+    def save_session(self):
+        """Saves input, contours, plan, canvas, settings and progress. Returns True if saved."""
+        if self.input_img is None or self.edges_pending() or self.edges_mask_bgr is None:
+            messagebox.showwarning("No Session", "Load an image and wait for edge processing first.")
+            return False
+
+        path = filedialog.asksaveasfilename(defaultextension=vector_session.SESSION_EXT,
+                                            filetypes=[("Vector Drawing Session", "*" + vector_session.SESSION_EXT)])
+        if not path:
+            return False
+
+        self.refresh_dirty_region()
+        try:
+            vector_session.save_session(path, self.input_img, self.contours, self.session_params(), self.cursor,
+                                        self.vector_img, self.edges_mask_bgr[:, :, 0], plan=self.plan)
+        except Exception as e:
+            messagebox.showerror("Save Error", f"Error saving session: {e}")
+            return False
+        self.update_status(f"Session saved to {path}")
+        return True
+
+    def open_session(self):
+        """Restores a saved session without reprocessing, ready to resume at its cursor."""
+        path = filedialog.askopenfilename(filetypes=[("Vector Drawing Session", "*" + vector_session.SESSION_EXT)])
+        if not path:
+            return
+
+        try:
+            session = vector_session.load_session(path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not open session: {e}")
+            return
+
+        # Drop whatever was running for the previous image
+        self.stop_drawing()
+        self.edge_job_id += 1
+        self.edge_future = None
+
+        params = session["params"]
+        for entry, key in ((self.canny_low, "canny_low"), (self.canny_high, "canny_high"),
+                           (self.min_contour_len, "min_contour"), (self.line_thickness, "thickness"),
+                           (self.speed_scale, "speed"), (self.finish_in, "finish_in"),
+                           (self.simplify_tolerance, "tolerance"), (self.supersample, "supersample")):
+            if key in params:
+                entry.delete(0, END)
+                entry.insert(0, str(params[key]))
+        self.use_color_sampling.set(params.get("sampled_color", False))
+        self.antialias.set(params.get("antialias", False))
+        self.auto_speed.set(params.get("auto_speed", False))
+        self.simplify_mode.set(params.get("simplify", "none"))
+        self.bg_color = params.get("bg_color", self.bg_color)
+        self.line_color = params.get("line_color", self.line_color)
+
+        self.input_img = session["input"]
+        self.input_hash = vector_core.image_hash(self.input_img)
+        self.contours = session["contours"]
+        self.plan = session["plan"] or vector_core.SegmentPlan(self.contours, self.input_img)
+        if session["edges"] is not None:
+            self.edges_mask_bgr = cv2.cvtColor(session["edges"], cv2.COLOR_GRAY2BGR)
+            self.edge_pyramid = None
+        self.cursor = min(session["cursor"], len(self.plan))
+        if session["canvas"] is not None:
+            self.vector_img = session["canvas"]
+        else:
+            # No saved canvas: redraw up to the cursor
+            self.vector_img = vector_core.new_canvas(self.input_img.shape, self.bg_color)
+            self.update_rasterizer()
+            self.rasterizer.draw(self.plan, self.vector_img, 0, self.cursor, params.get("thickness", 1),
+                                 self.line_color, self.use_color_sampling.get())
+
+        self.display_image(self.input_img, self.original_label)
+        self.show_edge_preview.set(False)
+        self.show_vector_canvas()
+
+        for button in (self.save_button, self.plot_button, self.sound_button, self.video_button,
+                       self.session_button, self.reset_button, self.reprocess_button, self.bg_toggle_button):
+            button.config(state=NORMAL)
+        done = self.cursor >= len(self.plan)
+        self.start_pause_button.config(text="Start Drawing" if self.cursor == 0 else "Resume",
+                                       command=self.start_drawing, state=DISABLED if done else NORMAL)
+        self.finish_now_button.config(state=DISABLED if done else NORMAL)
+
+        current_contour, _ = self.plan.locate(self.cursor)
+        self.update_status(f"Session {os.path.basename(path)} opened at contour {current_contour} of "
+                           f"{len(self.contours)} ({self.plan.progress(self.cursor) * 100:.0f}%).")
+
+    def mark_dirty(self, x0, y0, x1, y1, pad=1):
+        """Grows the pending dirty rectangle to cover a drawn box (inclusive coords)."""
+        h, w = self.vector_img.shape[:2]
+        x0, y0 = max(0, x0 - pad), max(0, y0 - pad)
+        x1, y1 = min(w, x1 + pad + 1), min(h, y1 + pad + 1)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        if self.dirty_rect is not None:
+            dx0, dy0, dx1, dy1 = self.dirty_rect
+            x0, y0, x1, y1 = min(x0, dx0), min(y0, dy0), max(x1, dx1), max(y1, dy1)
+        self.dirty_rect = (x0, y0, x1, y1)
+
+    def show_vector_canvas(self):
+        """Rebuilds the canvas pyramid after a whole-canvas change and shows the current view."""
+        self.dirty_rect = None
+        with TRACER.span("build canvas pyramid"):
+            self.vector_pyramid = vector_view.ImagePyramid(self.vector_img)
+        self.render_view()
+
+    def render_view(self):
+        """Shows the visible part of the canvas (or edge preview) in the persistent photo. Returns the level."""
+        if self.show_edge_preview.get() and self.edges_mask_bgr is not None:
+            if self.edge_pyramid is None:
+                self.edge_pyramid = vector_view.ImagePyramid(self.edges_mask_bgr)
+            pyramid = self.edge_pyramid
+        else:
+            pyramid = self.vector_pyramid
+        self.viewport.set_image_size(pyramid.size)
+
+        with TRACER.span("display view", zoom=self.viewport.zoom):
+            view, level = vector_view.render_view(pyramid, self.viewport)
+            pil = Image.fromarray(cv2.cvtColor(view, cv2.COLOR_BGR2RGB))
+            if self.vector_photo is None:
+                self.vector_photo = ImageTk.PhotoImage(pil)
+            else:
+                self.vector_photo.paste(pil)
+
+        self.vector_label.config(image=self.vector_photo)
+        self.vector_label.image = self.vector_photo
+        return level
+
+    def view_point(self, event):
+        """Converts a pointer position on the vector label to display pixels of the view."""
+        # The view is centered in the label, which may be larger than it
+        u = event.x - (self.vector_label.winfo_width() - self.IMG_SIZE[0]) / 2
+        v = event.y - (self.vector_label.winfo_height() - self.IMG_SIZE[1]) / 2
+        return u, v
+
+    def on_zoom(self, event):
+        """Mouse wheel: zooms the vector view around the pointer."""
+        zoom_in = event.num == 4 or event.delta > 0
+        self.viewport.zoom_at(self.ZOOM_STEP if zoom_in else 1 / self.ZOOM_STEP, *self.view_point(event))
+        level = self.render_view()
+        self.update_status(f"Zoom {self.viewport.zoom:.1f}x (pyramid level {level}). "
+                           f"Drag to pan, double-click to fit.")
+
+    def start_pan(self, event):
+        self.pan_anchor = (event.x, event.y)
+
+    def on_pan(self, event):
+        """Dragging: moves the zoomed view with the pointer."""
+        if self.pan_anchor is None or self.viewport.zoom == 1.0:
+            return
+        self.viewport.pan(event.x - self.pan_anchor[0], event.y - self.pan_anchor[1])
+        self.pan_anchor = (event.x, event.y)
+        self.render_view()
+
+    def reset_zoom(self, event=None):
+        """Fits the whole canvas in the view again."""
+        self.viewport.reset()
+        self.render_view()
+
+    def refresh_dirty_region(self):
+        """Copies only the changed part of vector_img into the displayed photo."""
+        if self.dirty_rect is None or self.show_edge_preview.get():
+            return
+
+        # Fall back to a full refresh if the label or pyramid isn't showing this canvas
+        if (self.vector_photo is None or self.vector_label.image is not self.vector_photo
+                or self.vector_pyramid is None or self.vector_pyramid.levels[0] is not self.vector_img):
+            self.show_vector_canvas()
+            return
+
+        x0, y0, x1, y1 = self.dirty_rect
+        self.dirty_rect = None
+
+        with TRACER.span("display dirty region", w=x1 - x0, h=y1 - y0):
+            # Every level must stay current, even when the box is off screen at this zoom
+            self.vector_pyramid.update(x0, y0, x1, y1)
+            box = self.viewport.display_box(x0, y0, x1, y1)
+            if box is None:
+                return
+            view, _ = vector_view.render_view(self.vector_pyramid, self.viewport, box)
+            patch = ImageTk.PhotoImage(Image.fromarray(cv2.cvtColor(view, cv2.COLOR_BGR2RGB)))
+            self.root.tk.call(str(self.vector_photo), "copy", str(patch), "-to", box[0], box[1])
+
+    def export_plot(self):
+        """Writes the contours as travel-optimized G-code or HPGL for a pen plotter."""
+        if not self.contours or self.edges_pending():
+            messagebox.showwarning("No Contours", "There are no contours to export.")
+            return
+        if self.export_future is not None:
+            return # One export at a time
+
+        path = filedialog.asksaveasfilename(defaultextension=".gcode",
+                                            filetypes=[("G-code", "*.gcode"), ("HPGL", "*.hpgl")])
+        if not path:
+            return
+
+        # Greedy ordering plus PLOT_OPT_TIME of 2-opt runs off the Tk thread
+        self.export_future = self.export_executor.submit(
+            vector_plot.export_plot, path, self.contours, self.input_img.shape[0],
+            time_budget=self.PLOT_OPT_TIME)
+        self.plot_button.config(state=DISABLED)
+        self.update_status(f"Optimizing stroke order for {path}...")
+
+        def describe(stats):
+            before, after = stats["original"][1], stats["two_opt"][1]
+            return f"Plot saved to {path}. Pen-up travel {before:,.0f} -> {after:,.0f} px."
+        self.root.after(self.EXPORT_POLL_MS, self.poll_export, self.plot_button, "plot", describe)
+
+    def export_sound(self):
+        """Saves the drawing's sonification as a WAV file, lasting Finish In seconds if set."""
+        if not self.contours or self.edges_pending():
+            messagebox.showwarning("No Contours", "There are no contours to sonify.")
+            return
+
+        path = filedialog.asksaveasfilename(defaultextension=".wav", filetypes=[("WAV Audio", "*.wav")])
+        if not path:
+            return
+
+        seconds = self.get_int_from_entry(self.finish_in, 0, min_val=0) or vector_sound.DEFAULT_SECONDS
+        try:
+            samples = vector_sound.render_sonification(self.plan, self.vector_img.shape[0], seconds)
+            vector_sound.write_wav(path, samples)
+        except Exception as e:
+            messagebox.showerror("Save Error", f"Error saving sound: {e}")
+            return
+        self.update_status(f"{seconds:g} s of sound saved to {path}")
+
+    def export_video(self):
+        """Renders the drawing animation off-screen to MP4/GIF, at the current Speed or Finish In pacing."""
+        if not self.contours or self.edges_pending():
+            messagebox.showwarning("No Contours", "There are no contours to animate.")
+            return
+        if self.export_future is not None:
+            return # One export at a time
+
+        path = filedialog.asksaveasfilename(defaultextension=".mp4",
+                                            filetypes=[("MP4 Video", "*.mp4"), ("GIF Animation", "*.gif")])
+        if not path:
+            return
+
+        finish_in = self.get_int_from_entry(self.finish_in, 0, min_val=0)
+        steps = self.get_int_from_entry(self.speed_scale, 500, min_val=1)
+        params = {
+            "thickness": self.get_int_from_entry(self.line_thickness, vector_core.DEFAULT_LINE_THICKNESS, min_val=1),
+            "sampled_color": self.use_color_sampling.get(),
+            "antialias": self.antialias.get(),
+            "supersample": self.get_int_from_entry(self.supersample, 1, min_val=1),
+            "bg_color": self.bg_color,
+            "line_color": self.line_color,
+        }
+        # Runs off the Tk thread; frames are drawn and GIF frames encoded on every core
+        self.export_future = self.export_executor.submit(
+            vector_animate.export_animation, self.plan, self.vector_img.shape, path, params,
+            self.DISPLAY_FPS, steps, finish_in or None, workers=os.cpu_count() or 1, log=lambda msg: None)
+        self.video_button.config(state=DISABLED)
+        self.update_status(f"Exporting video to {path}...")
+
+        def describe(result):
+            frames, elapsed = result
+            return f"Video saved to {path} ({frames} frames in {elapsed:.1f} s)."
+        self.root.after(self.EXPORT_POLL_MS, self.poll_export, self.video_button, "video", describe)
+
+    def poll_export(self, button, what, describe):
+        """Main thread: waits for the background export, then re-enables button and reports describe(result)."""
+        if not self.export_future.done():
+            self.root.after(self.EXPORT_POLL_MS, self.poll_export, button, what, describe)
+            return
+
+        future, self.export_future = self.export_future, None
+        button.config(state=NORMAL)
+        try:
+            result = future.result()
+        except Exception as e:
+            messagebox.showerror("Export Error", f"Error exporting {what}: {e}")
+            return
+        self.update_status(describe(result))
 
     def display_image(self, img, widget):
         """Converts a cv2 (BGR) image to a Tkinter-compatible image and updates the widget."""
@@ -475,9 +985,11 @@ class VectorDrawingApp:
         pil = Image.fromarray(rgb)
         
         # Resize to fit the label, which is better than fixed size
-        pil = pil.resize(self.IMG_SIZE, Image.LANCZOS) 
+        with TRACER.span("display_image resize"):
+            pil = pil.resize(self.IMG_SIZE, Image.LANCZOS) 
         
-        tk = ImageTk.PhotoImage(pil)
+        with TRACER.span("display_image PhotoImage"):
+            tk = ImageTk.PhotoImage(pil)
         
         widget.config(image=tk)
         widget.image = tk # Keep a reference
@@ -0,0 +1,211 @@
+"""Off-screen export of the drawing animation to MP4 or GIF.
+
+Replays the GUI's contour order and pacing without a display. The frame
+checkpoints come from the same FrameScheduler that drives draw_step: fixed
+--steps per frame (the Speed entry) or --seconds for the whole drawing (the
+Finish In entry).
+
+Frames are drawn in order onto one canvas, each adding only its own
+segments, so the whole animation costs about one full draw. Each frame's
+segments are drawn by a TiledRasterizer with --workers threads (frames
+below its parallel threshold are drawn inline). For GIF, palette mapping
+and LZW compression also run on a thread pool with at most --queue frames
+in flight, and encoded frames are written in order, so memory stays flat
+however long the animation is. MP4 frames go straight to a single
+cv2.VideoWriter.
+
+Example:
+    python vector_animate.py photos/ -o videos --seconds 10 --fps 30 --workers 4
+    python vector_animate.py photo.jpg -o videos --steps 500 --format gif
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+from PIL import GifImagePlugin, Image
+
+import vector_batch
+import vector_core
+import vector_raster
+
+DEFAULT_FPS = 30.0
+DEFAULT_HOLD = 1.0      # Seconds the finished drawing stays on screen at the end
+FORMATS = ("mp4", "gif")
+
+
+def frame_cursors(total, fps=DEFAULT_FPS, steps=None, seconds=None, hold=DEFAULT_HOLD):
+    """Yields the plan cursor shown in each frame, starting from a blank canvas.
+
+    With seconds, the drawing is paced to finish in that time at fps.
+    Otherwise each frame adds steps segments, like draw_step at a fixed Speed.
+    """
+    scheduler = vector_core.FrameScheduler()
+    if seconds:
+        scheduler.start(total, 0, "paced", duration=seconds, now=0.0)
+    else:
+        scheduler.start(total, 0, "fixed", steps or scheduler.INITIAL_STEPS, now=0.0)
+
+    cursor, frame = 0, 0
+    yield cursor
+    while cursor < total:
+        frame += 1
+        cursor += scheduler.next_steps(cursor, now=frame / fps)
+        yield cursor
+    for _ in range(int(hold * fps)):
+        yield cursor
+
+
+def gif_palette(plan, shape, params, workers=1):
+    """A 256-color palette image for every frame, taken from the finished drawing.
+
+    Drawing only adds strokes, so the last frame contains every color any
+    frame can show.
+    """
+    rasterizer = rasterizer_for(params, workers)
+    try:
+        final = rasterizer.render(plan, shape, params["bg_color"], params["thickness"], params["line_color"],
+                                  params["sampled_color"])
+    finally:
+        rasterizer.close()
+    return Image.fromarray(cv2.cvtColor(final, cv2.COLOR_BGR2RGB)).quantize(256)
+
+
+def rasterizer_for(params, workers=1):
+    """A tiled rasterizer with the requested quality, drawing on workers threads."""
+    return vector_raster.TiledRasterizer(workers=workers, antialias=params["antialias"],
+                                         supersample=params["supersample"])
+
+
+def frame_canvases(plan, shape, params, cursors, workers=1):
+    """Yields the canvas at each cursor, drawing only the segments added since the last one.
+
+    The same canvas is yielded every time; copy it to keep a frame.
+    """
+    thickness, line_color, sampled = params["thickness"], params["line_color"], params["sampled_color"]
+    rasterizer = rasterizer_for(params, workers)
+    canvas = vector_core.new_canvas(shape, params["bg_color"])
+    before = 0
+    try:
+        for cursor in cursors:
+            rasterizer.draw(plan, canvas, before, cursor, thickness, line_color, sampled)
+            before = cursor
+            yield canvas
+    finally:
+        rasterizer.close()
+
+
+def encode_gif_frame(frame, palette, duration_ms):
+    """Worker: maps a BGR frame onto the palette and returns its encoded GIF frame bytes."""
+    rgb = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    frame = rgb.quantize(palette=palette, dither=Image.Dither.NONE)
+    return b"".join(GifImagePlugin.getdata(frame, duration=duration_ms))
+
+
+class GifWriter:
+    """Streams pre-encoded frames into a looping GIF with one global palette."""
+
+    def __init__(self, path, palette, size, duration_ms):
+        self.f = open(path, "wb")
+        first = Image.new("P", size)
+        first.putpalette(palette.getpalette())
+        header, _ = GifImagePlugin.getheader(first, info={"loop": 0, "duration": duration_ms})
+        self.f.write(b"".join(header))
+
+    def write(self, data):
+        self.f.write(data)
+
+    def release(self):
+        self.f.write(b";")
+        self.f.close()
+
+
+def export_animation(plan, shape, output, params, fps=DEFAULT_FPS, steps=None, seconds=None,
+                     hold=DEFAULT_HOLD, workers=1, max_in_flight=None, log=print):
+    """Renders the drawing animation of plan to output (.mp4 or .gif). Returns (frames, seconds)."""
+    is_gif = output.lower().endswith(".gif")
+    height, width = shape[:2]
+    # GIF delays are in hundredths of a second
+    duration_ms = int(round(100 / fps)) * 10 if is_gif else None
+    palette = gif_palette(plan, shape, params, workers) if is_gif else None
+
+    if is_gif:
+        writer = GifWriter(output, palette, (width, height), duration_ms)
+    else:
+        writer = cv2.VideoWriter(output, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+        if not writer.isOpened():
+            raise IOError(f"could not open {output} for writing")
+
+    written = 0
+    start = time.perf_counter()
+    frames = frame_canvases(plan, shape, params, frame_cursors(len(plan), fps, steps, seconds, hold), workers)
+    if is_gif:
+        # Drawing stays sequential; each frame is copied off the canvas to be encoded in parallel
+        frames = vector_batch.ordered_map(lambda frame: encode_gif_frame(frame, palette, duration_ms),
+                                          (canvas.copy() for canvas in frames), workers, max_in_flight)
+    try:
+        for frame in frames:
+            writer.write(frame)
+            written += 1
+    finally:
+        writer.release()
+
+    elapsed = time.perf_counter() - start
+    log(f"{written} frames ({written / fps:.1f} s of animation) in {elapsed:.1f} s")
+    return written, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export drawing animations without a display.")
+    parser.add_argument("inputs", nargs="+", help="Image files, directories or glob patterns.")
+    parser.add_argument("-o", "--output", default="vector_output", help="Output directory.")
+    parser.add_argument("--format", choices=FORMATS, default="mp4", help="Video format.")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of drawing and GIF encoding threads (default: CPU count).")
+    parser.add_argument("--queue", type=int, default=None, help="Max GIF frames in flight (default: 2 x workers).")
+    parser.add_argument("--fps", type=float, default=DEFAULT_FPS, help="Output frame rate.")
+    pacing = parser.add_mutually_exclusive_group()
+    pacing.add_argument("--steps", type=int, default=None,
+                        help="Segments per frame, like the Speed entry (default: 500).")
+    pacing.add_argument("--seconds", type=float, default=None,
+                        help="Finish the drawing in this many seconds, like the Finish In entry.")
+    parser.add_argument("--hold", type=float, default=DEFAULT_HOLD,
+                        help="Seconds to hold the finished drawing at the end.")
+    vector_batch.add_pipeline_args(parser)
+    args = parser.parse_args(argv)
+    params = vector_batch.params_from_args(args)
+
+    paths = vector_batch.collect_inputs(args.inputs)
+    if not paths:
+        print("No images found.", file=sys.stderr)
+        return 1
+    os.makedirs(args.output, exist_ok=True)
+    fps = max(1.0, args.fps)
+    steps = args.steps and max(1, args.steps)
+
+    outputs, clashes = vector_batch.output_paths(paths, args.output, f".{args.format}")
+    failures = vector_batch.report_clashes(clashes, len(paths))
+    for done, (path, out_path) in enumerate(outputs.items(), failures + 1):
+        name = os.path.basename(path)
+        loaded = vector_batch.load_plan(path, params)
+        if loaded is None:
+            print(f"[{done}/{len(paths)}] FAILED {name}: could not read image", file=sys.stderr)
+            failures += 1
+            continue
+        img, _, _, plan = loaded
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        try:
+            export_animation(plan, img.shape, out_path, params, fps, steps, args.seconds, max(0.0, args.hold),
+                             max(1, args.workers), args.queue and max(1, args.queue),
+                             log=lambda msg: print(f"[{done}/{len(paths)}] {name}: {msg}"))
+        except IOError as e:
+            print(f"[{done}/{len(paths)}] FAILED {name}: {e}", file=sys.stderr)
+            failures += 1
+
+    print(f"Done: {len(paths) - failures} ok, {failures} failed.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+"""Headless batch vectorization.
+
+Runs the same pipeline as the GUI over a directory or glob of images using a
+process pool. Each result is written to disk as soon as its image finishes.
+
+Example:
+    python vector_batch.py photos/ "scans/*.png" -o out --workers 8 --sampled-color
+
+With --full-res, images are not resized; each one is processed in tiles by the
+pool instead (see vector_tiles.py) and written as a directory of tile PNGs.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
+
+import cv2
+
+import vector_core
+import vector_tiles
+from vector_trace import TRACER
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".npy")
+
+
+def collect_inputs(patterns):
+    """Expands directories and glob patterns into a sorted list of image paths."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            candidates = glob.glob(pattern)
+        paths.extend(p for p in candidates
+                     if os.path.isfile(p) and p.lower().endswith(IMAGE_EXTS))
+    return sorted(set(paths))
+
+
+def ordered_map(fn, items, workers=1, max_in_flight=None):
+    """Yields fn(item) for each item, in order, computed on a thread pool.
+
+    Items are pulled lazily and at most max_in_flight (default 2 x workers)
+    are submitted at once, so memory stays flat however many there are.
+    """
+    max_in_flight = max_in_flight or 2 * workers
+    # A bounded window of futures: submit in order, always yield the oldest first
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            for item in items:
+                if len(pending) >= max_in_flight:
+                    yield pending.popleft().result()
+                pending.append(pool.submit(fn, item))
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def output_paths(paths, out_dir, ext=".png"):
+    """Maps input paths to output files in out_dir. Returns (outputs, clashes).
+
+    Inputs keep their folders below the deepest folder they all share, so
+    x/p.png and y/p.png get separate outputs. An input whose output name is
+    already taken by an earlier one (q.jpg and q.png) is left out of outputs
+    and listed in clashes as {path: earlier_path}.
+    """
+    if not paths:
+        return {}, {}
+    dirs = [os.path.dirname(os.path.abspath(p)) for p in paths]
+    root = os.path.commonpath(dirs)
+    outputs, clashes, owners = {}, {}, {}
+    for path, folder in zip(paths, dirs):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        out_path = os.path.normpath(os.path.join(out_dir, os.path.relpath(folder, root),
+                                                 f"{stem}_vector{ext}"))
+        key = os.path.normcase(out_path)
+        if key in owners:
+            clashes[path] = owners[key]
+        else:
+            owners[key] = path
+            outputs[path] = out_path
+    return outputs, clashes
+
+
+def report_clashes(clashes, total):
+    """Prints one failure per input left out by output_paths. Returns how many there were."""
+    for done, (path, other) in enumerate(clashes.items(), 1):
+        print(f"[{done}/{total}] FAILED {os.path.basename(path)}: same output name as {other}", file=sys.stderr)
+    return len(clashes)
+
+
+def process_one(job):
+    """Worker: vectorizes one image and writes it out. Returns a result dict."""
+    path, out_path, params = job
+    result = {"path": path, "output": None, "contours": 0, "error": None, "timings": {}, "trace": []}
+    timings = result["timings"]
+    if params.get("trace_origin") is not None:
+        # perf_counter is system-wide, so a shared origin lines up every worker's spans
+        TRACER.enabled, TRACER.origin = True, params["trace_origin"]
+    t0 = time.perf_counter()
+
+    try:
+        img = vector_core.load_image(path, params["size"])
+        if img is None:
+            result["error"] = "could not read image"
+            return result
+        t1 = time.perf_counter()
+
+        _, contours = vector_core.extract_contours(
+            img, params["canny_low"], params["canny_high"], params["min_contour"])
+        contours = vector_core.ContourStore.from_contours(contours, params["simplify"], params["tolerance"])
+        t2 = time.perf_counter()
+
+        canvas = vector_core.new_canvas(img.shape, params["bg_color"])
+        vector_core.render_contours(canvas, contours, params["thickness"], params["line_color"],
+                                    source_img=img if params["sampled_color"] else None,
+                                    line_type=cv2.LINE_AA if params["antialias"] else cv2.LINE_8,
+                                    supersample=params["supersample"])
+        t3 = time.perf_counter()
+
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        if not cv2.imwrite(out_path, canvas):
+            result["error"] = f"could not write {out_path}"
+            return result
+        t4 = time.perf_counter()
+
+        timings.update(read=t1 - t0, edges=t2 - t1, render=t3 - t2, write=t4 - t3, total=t4 - t0)
+        result["output"] = out_path
+        result["contours"] = len(contours)
+        result["footprint"] = contours.report()
+    except Exception as e:
+        result["error"] = str(e)
+
+    # Ship this worker's spans back to the parent process
+    if TRACER.enabled:
+        TRACER.add_complete(os.path.basename(path), t0, time.perf_counter() - t0, {"contours": result["contours"]})
+        result["trace"] = TRACER.take_events()
+    return result
+
+
+def add_pipeline_args(parser):
+    """Adds the options matching the GUI entries; read them back with params_from_args."""
+    parser.add_argument("--canny-low", type=int, default=vector_core.DEFAULT_CANNY_LOW)
+    parser.add_argument("--canny-high", type=int, default=vector_core.DEFAULT_CANNY_HIGH)
+    parser.add_argument("--min-contour", type=int, default=vector_core.DEFAULT_MIN_CONTOUR)
+    parser.add_argument("--line-thick", type=int, default=vector_core.DEFAULT_LINE_THICKNESS)
+    parser.add_argument("--size", type=int, nargs=2, metavar=("W", "H"), default=vector_core.IMG_SIZE,
+                        help="Resize inputs to W H before processing (default: 700 700).")
+    parser.add_argument("--sampled-color", action="store_true",
+                        help="Color each segment from the source image.")
+    parser.add_argument("--white-bg", action="store_true",
+                        help="Black lines on a white background.")
+    parser.add_argument("--antialias", action="store_true", help="Anti-aliased lines (cv2.LINE_AA).")
+    parser.add_argument("--supersample", type=int, default=1, metavar="K",
+                        help="Draw at K x resolution and average down (default: 1, off).")
+    parser.add_argument("--simplify", choices=vector_core.SIMPLIFY_MODES, default="none",
+                        help="Contour simplification: chain (lossless chain code) or dp (approxPolyDP).")
+    parser.add_argument("--tolerance", type=float, default=vector_core.DEFAULT_SIMPLIFY_TOLERANCE,
+                        help="approxPolyDP tolerance in pixels for --simplify dp.")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Vectorize images without the GUI.")
+    parser.add_argument("inputs", nargs="+", help="Image files, directories or glob patterns.")
+    parser.add_argument("-o", "--output", default="vector_output", help="Output directory.")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (default: CPU count).")
+    add_pipeline_args(parser)
+    parser.add_argument("--full-res", action="store_true",
+                        help="Process at full resolution in tiles instead of resizing.")
+    parser.add_argument("--tile-size", type=int, default=vector_tiles.DEFAULT_TILE_SIZE,
+                        help="Tile edge length in pixels for --full-res.")
+    parser.add_argument("--overlap", type=int, default=vector_tiles.DEFAULT_OVERLAP,
+                        help="Extra pixels read around each tile for edge detection in --full-res.")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Record per-stage timings and write them to PATH as a Chrome trace.")
+    return parser
+
+
+def load_plan(path, params):
+    """Loads an image and runs the pipeline up to the segment plan.
+
+    Returns (img, edges, contours, plan), with contours as a ContourStore and
+    colors sampled from img if params["sampled_color"] is set, or None if the
+    image cannot be read.
+    """
+    img = vector_core.load_image(path, params["size"])
+    if img is None:
+        return None
+    edges, contours = vector_core.extract_contours(img, params["canny_low"], params["canny_high"],
+                                                   params["min_contour"])
+    contours = vector_core.ContourStore.from_contours(contours, params["simplify"], params["tolerance"])
+    plan = vector_core.SegmentPlan(contours, img if params["sampled_color"] else None)
+    return img, edges, contours, plan
+
+
+def params_from_args(args):
+    """Builds the worker parameter dict, clamping values the same way the GUI entries do."""
+    bg_color, line_color = vector_core.WHITE_BG if args.white_bg else vector_core.BLACK_BG
+    return {
+        "canny_low": max(0, args.canny_low),
+        "canny_high": max(0, args.canny_high),
+        "min_contour": max(2, args.min_contour),
+        "thickness": max(1, args.line_thick),
+        "size": tuple(args.size) if args.size else None,
+        "sampled_color": args.sampled_color,
+        "antialias": args.antialias,
+        "supersample": max(1, args.supersample),
+        "simplify": args.simplify,
+        "tolerance": max(0.0, args.tolerance),
+        "bg_color": bg_color,
+        "line_color": line_color,
+    }
+
+
+def report(done, total, result):
+    """Prints one result line. Returns False if the image failed."""
+    name = os.path.basename(result["path"])
+    if result["error"]:
+        print(f"[{done}/{total}] FAILED {name}: {result['error']}", file=sys.stderr)
+        return False
+    t = result["timings"]
+    print(f"[{done}/{total}] {name}: {result['contours']} contours, "
+          f"{t['total'] * 1000:.0f} ms (read {t['read'] * 1000:.0f}, edges {t['edges'] * 1000:.0f}, "
+          f"render {t['render'] * 1000:.0f}, write {t['write'] * 1000:.0f})")
+    if result.get("footprint"):
+        print(f"    {result['footprint']}")
+    return True
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    paths = collect_inputs(args.inputs)
+    if not paths:
+        print("No images found.", file=sys.stderr)
+        return 1
+
+    os.makedirs(args.output, exist_ok=True)
+    params = params_from_args(args)
+    workers = max(1, args.workers)
+    trace_events = []
+    if args.trace:
+        TRACER.enabled = True
+        params["trace_origin"] = TRACER.origin
+
+    print(f"Vectorizing {len(paths)} image(s) with {workers} worker(s)...")
+    outputs, clashes = output_paths(paths, args.output, "_tiles" if args.full_res else ".png")
+    failures = report_clashes(clashes, len(paths))
+    start = time.perf_counter()
+
+    if args.full_res:
+        # One image at a time; the pool works on its tiles
+        for done, (path, out_dir) in enumerate(outputs.items(), failures + 1):
+            with TRACER.span(os.path.basename(path)):
+                result = vector_tiles.vectorize_tiled(path, out_dir, params, max(1, args.tile_size),
+                                                      max(0, args.overlap), workers)
+            failures += not report(done, len(paths), result)
+    else:
+        jobs = ((path, out_path, params) for path, out_path in outputs.items())
+        with Pool(workers) as pool:
+            for done, result in enumerate(pool.imap_unordered(process_one, jobs), failures + 1):
+                failures += not report(done, len(paths), result)
+                trace_events.extend(result["trace"])
+
+    elapsed = time.perf_counter() - start
+    print(f"Done: {len(paths) - failures} ok, {failures} failed in {elapsed:.1f} s.")
+    if args.trace:
+        TRACER.export(args.trace, trace_events)
+        print(f"Trace written to {args.trace}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
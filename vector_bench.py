@@ -0,0 +1,332 @@
+"""Benchmarks for the edge, drawing and display hot paths.
+
+Runs against the Tk-free core, so it works headless. If a display is available
+(a desktop session or Xvfb), the Tk PhotoImage cost is measured as well.
+
+Each case is a synthetic image at one size and edge density, or a reference
+image given with --images. For each case it measures:
+    edges     process_edges stages (gray, Canny + dilate, findContours + sort)
+    draw_step the animation loop: SegmentPlan slices of --steps segments
+    finish    finish_now: the rest of the plan in one draw, solid and sampled,
+              single-threaded and on the tiled rasterizer (all cores)
+    display   the zoomable view: pyramid build, a dirty-box refresh, and a
+              full view at zoom 1 and zoomed in
+
+Results are written as JSON. With --baseline, they are compared metric by
+metric and regressions beyond --tolerance make the run exit non-zero.
+Timings under NOISE_FLOOR_MS are not compared, and neither are the rates
+computed from them: every X_per_s metric is stored next to the timing it
+came from (see timing_metric).
+
+Example:
+    python vector_bench.py -o bench.json --save-baseline bench_baseline.json
+    python vector_bench.py -o bench.json --baseline bench_baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import vector_core
+import vector_raster
+import vector_view
+
+try:
+    import resource  # Unix only; used for the process peak RSS
+except ImportError:
+    resource = None
+
+SIZES = (350, 700, 1400)
+DENSITIES = {"low": 40, "medium": 200, "high": 800}  # Shapes drawn per 700x700 of area
+DEFAULT_STEPS = 500          # Speed entry default
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.15     # Allowed relative slowdown before flagging a regression
+NOISE_FLOOR_MS = 1.0         # Timings this short are too noisy to compare
+VIEW_ZOOM = 4.0              # Zoom of the magnified display case
+
+
+def synthetic_image(size, shapes, seed=0):
+    """A deterministic test image: random filled circles and lines, lightly blurred."""
+    rng = np.random.default_rng(seed)
+    img = np.full((size, size, 3), 128, dtype=np.uint8)
+    count = max(1, int(shapes * (size / 700) ** 2))
+    for _ in range(count):
+        color = tuple(int(v) for v in rng.integers(0, 256, 3))
+        x, y = (int(v) for v in rng.integers(0, size, 2))
+        if rng.random() < 0.7:
+            cv2.circle(img, (x, y), int(rng.integers(3, max(4, size // 8))), color, -1)
+        else:
+            x2, y2 = (int(v) for v in rng.integers(0, size, 2))
+            cv2.line(img, (x, y), (x2, y2), color, int(rng.integers(1, 6)))
+    return cv2.GaussianBlur(img, (5, 5), 0)
+
+
+def timed(fn, repeat):
+    """Runs fn repeat times. Returns (median seconds, last result, peak traced bytes).
+
+    The peak comes from one extra run under tracemalloc, kept out of the
+    timings because tracing slows allocations down. NumPy buffers are traced;
+    OpenCV's internal scratch memory is not.
+    """
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(times), result, peak
+
+
+def bench_edges(img, repeat):
+    gray_t, gray, _ = timed(lambda: vector_core.to_gray(img), repeat)
+    canny_t, edges, _ = timed(lambda: vector_core.detect_edges(gray, vector_core.DEFAULT_CANNY_LOW,
+                                                               vector_core.DEFAULT_CANNY_HIGH), repeat)
+    find_t, contours, _ = timed(lambda: vector_core.find_contours(edges, vector_core.DEFAULT_MIN_CONTOUR), repeat)
+    plan_t, plan, plan_peak = timed(lambda: vector_core.SegmentPlan(contours, img), repeat)
+    total = gray_t + canny_t + find_t
+    metrics = {
+        "gray_ms": gray_t * 1000,
+        "canny_ms": canny_t * 1000,
+        "contours_ms": find_t * 1000,
+        "total_ms": total * 1000,
+        "contours_per_s": len(contours) / total if total else 0.0,
+        "plan_ms": plan_t * 1000,
+        "plan_peak_bytes": plan_peak,
+    }
+    return metrics, plan
+
+
+def bench_draw_step(img, plan, steps, repeat):
+    def animate():
+        canvas = vector_core.new_canvas(img.shape, vector_core.BLACK_BG[0])
+        for start in range(0, len(plan), steps):
+            plan.draw(canvas, start, start + steps, 1, vector_core.BLACK_BG[1])
+            plan.bbox(start, start + steps)
+        return canvas
+
+    seconds, _, peak = timed(animate, repeat)
+    frames = max(1, -(-len(plan) // steps))
+    return {
+        "total_ms": seconds * 1000,
+        "segments_per_s": len(plan) / seconds if seconds else 0.0,
+        "frame_ms": seconds * 1000 / frames,
+        "peak_bytes": peak,
+    }
+
+
+def bench_finish(img, plan, repeat):
+    metrics = {}
+    for name, sampled in (("solid", False), ("sampled", True)):
+        def finish():
+            canvas = vector_core.new_canvas(img.shape, vector_core.BLACK_BG[0])
+            return plan.draw(canvas, 0, len(plan), 1, vector_core.BLACK_BG[1], sampled)
+        seconds, _, peak = timed(finish, repeat)
+        metrics[f"{name}_ms"] = seconds * 1000
+        metrics[f"{name}_segments_per_s"] = len(plan) / seconds if seconds else 0.0
+        metrics[f"{name}_peak_bytes"] = peak
+
+    rasterizer = vector_raster.TiledRasterizer()
+    try:
+        seconds, _, _ = timed(lambda: rasterizer.render(plan, img.shape, vector_core.BLACK_BG[0], 1,
+                                                        vector_core.BLACK_BG[1]), repeat)
+    finally:
+        rasterizer.close()
+    metrics["tiled_ms"] = seconds * 1000
+    metrics["tiled_segments_per_s"] = len(plan) / seconds if seconds else 0.0
+    return metrics
+
+
+def bench_display(img, plan, steps, repeat, tk_root=None):
+    canvas = plan.draw(vector_core.new_canvas(img.shape, vector_core.BLACK_BG[0]), 0, len(plan), 1,
+                       vector_core.BLACK_BG[1])
+    viewport = vector_view.Viewport(vector_core.IMG_SIZE, canvas.shape[1::-1])
+
+    # show_vector_canvas: the pyramid is rebuilt after a whole-canvas change
+    build_t, pyramid, _ = timed(lambda: vector_view.ImagePyramid(canvas), repeat)
+
+    # refresh_dirty_region: update every level under one frame's segments, render only that display box
+    box = plan.bbox(0, min(steps, len(plan))) or (0, 0, 0, 0)
+    x0, y0, x1, y1 = box[0], box[1], box[2] + 2, box[3] + 2
+
+    def dirty_region():
+        pyramid.update(x0, y0, x1, y1)
+        view_box = viewport.display_box(x0, y0, x1, y1)
+        if view_box is None:
+            return None
+        view, _ = vector_view.render_view(pyramid, viewport, view_box)
+        return Image.fromarray(cv2.cvtColor(view, cv2.COLOR_BGR2RGB))
+
+    # render_view: the whole display, fitted and magnified around the center
+    def full_view():
+        view, _ = vector_view.render_view(pyramid, viewport)
+        return Image.fromarray(cv2.cvtColor(view, cv2.COLOR_BGR2RGB))
+
+    dirty_t, dirty_pil, _ = timed(dirty_region, repeat)
+    fit_t, fit_pil, _ = timed(full_view, repeat)
+    viewport.zoom_at(VIEW_ZOOM, viewport.display_size[0] / 2, viewport.display_size[1] / 2)
+    zoom_t, _, _ = timed(full_view, repeat)
+    metrics = {"pyramid_build_ms": build_t * 1000, "dirty_update_ms": dirty_t * 1000,
+               "view_fit_ms": fit_t * 1000, "view_zoom_ms": zoom_t * 1000}
+
+    if tk_root is not None:
+        from PIL import ImageTk
+        # The persistent photo is pasted on full refreshes; dirty patches are new small photos
+        photo = ImageTk.PhotoImage(fit_pil)
+        paste_t, _, _ = timed(lambda: photo.paste(fit_pil), repeat)
+        metrics["view_paste_ms"] = paste_t * 1000
+        if dirty_pil is not None and dirty_pil.width and dirty_pil.height:
+            patch_t, _, _ = timed(lambda: ImageTk.PhotoImage(dirty_pil), repeat)
+            metrics["dirty_photo_ms"] = patch_t * 1000
+    return metrics
+
+
+def make_tk_root():
+    """Returns a hidden Tk root if a display is available, else None."""
+    try:
+        import tkinter
+        root = tkinter.Tk()
+        root.withdraw()
+        return root
+    except Exception:
+        return None
+
+
+def run_case(name, img, steps, repeat, tk_root):
+    edges, plan = bench_edges(img, repeat)
+    return {
+        "name": name,
+        "size": list(img.shape[1::-1]),
+        "contours": plan.num_contours,
+        "segments": len(plan),
+        "metrics": {
+            "edges": edges,
+            "draw_step": bench_draw_step(img, plan, steps, repeat),
+            "finish": bench_finish(img, plan, repeat),
+            "display": bench_display(img, plan, steps, repeat, tk_root),
+        },
+    }
+
+
+def higher_is_better(metric):
+    return metric.endswith("_per_s")
+
+
+def timing_metric(metric):
+    """The _ms metric a rate was computed from: solid_segments_per_s -> solid_ms, segments_per_s -> total_ms."""
+    prefix = metric[:-len("_per_s")].rpartition("_")[0]
+    return f"{prefix or 'total'}_ms"
+
+
+def compare(results, baseline, tolerance):
+    """Returns a list of regression messages between two result documents."""
+    old_cases = {case["name"]: case for case in baseline.get("cases", [])}
+    regressions = []
+    for case in results["cases"]:
+        old = old_cases.get(case["name"])
+        if old is None:
+            continue
+        for group, metrics in case["metrics"].items():
+            old_metrics = old["metrics"].get(group, {})
+            for metric, value in metrics.items():
+                before = old_metrics.get(metric)
+                if not before:
+                    continue
+                if metric.endswith("_ms") and max(before, value) < NOISE_FLOOR_MS:
+                    continue
+                # A rate is as noisy as the timing behind it (baselines without that timing still compare)
+                timing = timing_metric(metric) if higher_is_better(metric) else None
+                if (timing in metrics and timing in old_metrics
+                        and max(metrics[timing], old_metrics[timing]) < NOISE_FLOOR_MS):
+                    continue
+                # Relative change in the "worse" direction
+                change = (before - value) / before if higher_is_better(metric) else (value - before) / before
+                if change > tolerance:
+                    regressions.append(f"{case['name']} {group}.{metric}: {before:.4g} -> {value:.4g} "
+                                       f"({change:+.0%} worse)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the vectorization hot paths.")
+    parser.add_argument("-o", "--output", default="bench_results.json", help="Where to write results.")
+    parser.add_argument("--images", nargs="*", default=[], help="Reference images to add as cases.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(SIZES), help="Synthetic image sizes.")
+    parser.add_argument("--densities", nargs="*", default=list(DENSITIES), choices=list(DENSITIES),
+                        help="Synthetic edge densities.")
+    parser.add_argument("--steps", type=int, default=DEFAULT_STEPS, help="Segments per animation frame.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Runs per measurement (median).")
+    parser.add_argument("--baseline", help="Compare against this results file.")
+    parser.add_argument("--save-baseline", help="Also write the results here as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Relative slowdown that counts as a regression.")
+    parser.add_argument("--no-tk", action="store_true", help="Skip Tk PhotoImage timings.")
+    args = parser.parse_args(argv)
+
+    cases = [(f"synthetic-{size}-{density}", lambda s=size, d=density: synthetic_image(s, DENSITIES[d]))
+             for size in args.sizes for density in args.densities]
+    for path in args.images:
+        cases.append((f"image-{os.path.basename(path)}", lambda p=path: vector_core.load_image(p)))
+
+    tk_root = None if args.no_tk else make_tk_root()
+    repeat, steps = max(1, args.repeat), max(1, args.steps)
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "machine": platform.machine(),
+        "tk": tk_root is not None,
+        "cases": [],
+    }
+
+    for name, load in cases:
+        img = load()
+        if img is None:
+            print(f"{name}: could not read image, skipped", file=sys.stderr)
+            continue
+        case = run_case(name, img, steps, repeat, tk_root)
+        results["cases"].append(case)
+        m = case["metrics"]
+        print(f"{name}: {case['contours']} contours, {case['segments']} segments | "
+              f"edges {m['edges']['total_ms']:.1f} ms ({m['edges']['contours_per_s']:,.0f} contours/s) | "
+              f"draw_step {m['draw_step']['segments_per_s']:,.0f} seg/s | "
+              f"finish {m['finish']['solid_segments_per_s']:,.0f} seg/s | "
+              f"display {m['display']['view_fit_ms']:.2f} ms view, {m['display']['dirty_update_ms']:.2f} ms dirty")
+
+    if resource is not None:
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        results["peak_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print("  " + line)
+            return 1
+        print(f"No regressions against {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,698 @@
+"""GUI-free vectorization core shared by the Tk app and the batch CLI.
+
+The pipeline is: grayscale -> Canny -> dilate -> findContours -> length
+filter -> sort by area -> render line segments onto a background canvas.
+"""
+import hashlib
+import sys
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from vector_trace import TRACER, traced
+
+# --- Defaults (mirror the entry widgets in the GUI) ---
+IMG_SIZE = (700, 700)
+DEFAULT_CANNY_LOW = 10
+DEFAULT_CANNY_HIGH = 60
+DEFAULT_MIN_CONTOUR = 10
+DEFAULT_LINE_THICKNESS = 1
+
+BLACK_BG = ((0, 0, 0), (0, 255, 0))        # (bg_color, line_color)
+WHITE_BG = ((255, 255, 255), (0, 0, 0))
+
+CACHE_BUDGET_BYTES = 256 * 1024 * 1024
+
+SIMPLIFY_MODES = ("none", "chain", "dp")  # Contour simplification: off, lossless chain code, approxPolyDP
+DEFAULT_SIMPLIFY_TOLERANCE = 1.0          # approxPolyDP epsilon in pixels
+
+TARGET_FRAME_TIME = 1 / 60   # Seconds per animation frame for adaptive pacing
+FRAME_WORK_FRACTION = 0.6    # Share of each frame spent drawing; the rest is left for Tk events
+
+
+def load_image(path, size=IMG_SIZE):
+    """Reads an image (or a .npy BGR array) and resizes it like the GUI does. Returns None on failure."""
+    img = np.load(path) if path.lower().endswith(".npy") else cv2.imread(path)
+    if img is None:
+        return None
+    if size is not None:
+        img = cv2.resize(img, size)
+    return img
+
+
+@traced("cvtColor gray")
+def to_gray(img):
+    """Converts a BGR image to grayscale."""
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+def detect_edges(gray, low_thresh, high_thresh):
+    """Runs Canny and a single dilation pass to close small gaps."""
+    with TRACER.span("Canny"):
+        edges = cv2.Canny(gray, low_thresh, high_thresh)
+    with TRACER.span("dilate"):
+        return cv2.dilate(edges, None)
+
+
+def find_contours(edges, min_len):
+    """Finds contours in an edge mask, drops short ones and sorts by area (largest first)."""
+    with TRACER.span("findContours"):
+        cnts, _ = cv2.findContours(edges, cv2.RETR_LIST, cv2.CHAIN_APPROX_NONE)
+
+    # Filter contours by length
+    with TRACER.span("length filter"):
+        filtered_cnts = [c for c in cnts if len(c) >= min_len]
+
+    with TRACER.span("contourArea sort", contours=len(filtered_cnts)):
+        return sorted(filtered_cnts, key=cv2.contourArea, reverse=True)
+
+
+def extract_contours(img, low_thresh=DEFAULT_CANNY_LOW, high_thresh=DEFAULT_CANNY_HIGH,
+                     min_len=DEFAULT_MIN_CONTOUR):
+    """Runs the full edge pipeline on a BGR image. Returns (edges, contours)."""
+    edges = detect_edges(to_gray(img), low_thresh, high_thresh)
+    return edges, find_contours(edges, min_len)
+
+
+def image_hash(img):
+    """Content hash of an image array, used as the base of cache keys."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((img.shape, img.dtype.str)).encode())
+    h.update(np.ascontiguousarray(img).data)
+    return h.hexdigest()
+
+
+def _nbytes(value):
+    """Approximate memory held by a cached stage result."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return sum(v.nbytes for v in value)
+
+
+class PipelineCache:
+    """Bounded LRU cache for the gray, edges and contours stages.
+
+    Each stage is keyed by the image hash plus only the parameters it depends
+    on, so changing min_len reuses the Canny output and changing nothing reuses
+    everything. Cached arrays are shared and must not be modified.
+    """
+
+    def __init__(self, max_bytes=CACHE_BUDGET_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (value, nbytes)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes_used = 0
+
+    def stats_text(self):
+        return (f"cache {self.hits} hits / {self.misses} misses, "
+                f"{self.bytes_used / (1024 * 1024):.1f} MB")
+
+    def stage(self, key, compute):
+        """Returns the cached value for key, or computes, stores and returns it."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        value = compute()
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            return value  # Too big to ever fit; don't flush everything else for it
+
+        self._entries[key] = (value, size)
+        self.bytes_used += size
+        while self.bytes_used > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.bytes_used -= evicted_size
+        return value
+
+    def extract_contours(self, img, low_thresh=DEFAULT_CANNY_LOW, high_thresh=DEFAULT_CANNY_HIGH,
+                         min_len=DEFAULT_MIN_CONTOUR, img_hash=None):
+        """Cached version of extract_contours. Pass img_hash to skip rehashing the image."""
+        if img_hash is None:
+            img_hash = image_hash(img)
+
+        def compute_edges():
+            gray = self.stage(("gray", img_hash), lambda: to_gray(img))
+            return detect_edges(gray, low_thresh, high_thresh)
+
+        edges = self.stage(("edges", img_hash, low_thresh, high_thresh), compute_edges)
+        contours = self.stage(("contours", img_hash, low_thresh, high_thresh, min_len),
+                              lambda: find_contours(edges, min_len))
+        return edges, list(contours)
+
+
+def new_canvas(shape, bg_color):
+    """Creates a blank BGR canvas filled with the background color."""
+    return np.full((shape[0], shape[1], 3), bg_color, dtype=np.uint8)
+
+
+def contour_list_bytes(contours):
+    """Memory held by a list of contour arrays, including per-array object overhead."""
+    return sys.getsizeof(contours) + sum(sys.getsizeof(c) for c in contours)
+
+
+def format_bytes(n):
+    """Human-readable size, e.g. "12 MB"."""
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+class ContourStore:
+    """Contours packed into one coordinate buffer plus offsets.
+
+    Contour k is points[offsets[k]:offsets[k + 1]]. Coordinates are int16 when
+    they fit (int32 otherwise), so a busy edge map is two arrays instead of
+    thousands of small (N, 1, 2) int32 arrays. Indexing returns (N, 1, 2)
+    views, so code written for contour lists (vector_plot) reads the store
+    directly.
+    """
+
+    def __init__(self, points, offsets, source_bytes=None, source_segments=None):
+        self.points = points
+        self.offsets = offsets
+        # What the contour list cost before packing, for report()
+        self.source_bytes = self.nbytes if source_bytes is None else source_bytes
+        self.source_segments = self.num_segments if source_segments is None else source_segments
+
+    @classmethod
+    def from_contours(cls, contours, simplify="none", tolerance=DEFAULT_SIMPLIFY_TOLERANCE):
+        """Packs a contour list, optionally simplified (see SIMPLIFY_MODES)."""
+        if isinstance(contours, ContourStore):
+            store = contours
+        else:
+            pieces = [c.reshape(-1, 2) for c in contours]
+            counts = np.array([len(p) for p in pieces], dtype=np.int64)
+            offsets = np.zeros(len(pieces) + 1, dtype=np.int64)
+            np.cumsum(counts, out=offsets[1:])
+            points = np.concatenate(pieces) if pieces else np.zeros((0, 2), dtype=np.int32)
+            store = cls(np.ascontiguousarray(points, dtype=_coord_dtype(points)), offsets,
+                        contour_list_bytes(contours), int(offsets[-1]) - len(pieces))
+
+        with TRACER.span("simplify", mode=simplify):
+            if simplify == "chain":
+                return store._filtered(store._chain_keep())
+            if simplify == "dp":
+                return store._approx_poly(tolerance)
+        return store
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, k):
+        return self.contour(k).reshape(-1, 1, 2)
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self[k]
+
+    def contour(self, k):
+        """Points of contour k as an (N, 2) view into the buffer."""
+        if k < 0:
+            k += len(self)
+        return self.points[self.offsets[k]:self.offsets[k + 1]]
+
+    @property
+    def num_points(self):
+        return len(self.points)
+
+    @property
+    def num_segments(self):
+        return self.num_points - len(self)
+
+    @property
+    def nbytes(self):
+        return self.points.nbytes + self.offsets.nbytes
+
+    def report(self):
+        """One-line footprint and segment-count summary against the unpacked list."""
+        before, after = self.source_segments, self.num_segments
+        reduction = (1 - after / before) * 100 if before else 0.0
+        return (f"{before:,} -> {after:,} segments (-{reduction:.0f}%), "
+                f"{format_bytes(self.source_bytes)} -> {format_bytes(self.nbytes)}")
+
+    def _chain_keep(self):
+        """Mask of points to keep: drops points that continue the previous step unchanged.
+
+        findContours(CHAIN_APPROX_NONE) steps one pixel at a time, so straight
+        horizontal, vertical and diagonal runs collapse to their ends (the same
+        result as CHAIN_APPROX_SIMPLE). 1-2 px lines rasterize identically.
+        """
+        keep = np.ones(self.num_points, dtype=bool)
+        if self.num_points > 2:
+            steps = np.diff(self.points, axis=0)
+            keep[1:-1] = (steps[1:] != steps[:-1]).any(axis=1)
+        keep[self.offsets[:-1]] = True
+        keep[self.offsets[1:] - 1] = True
+        return keep
+
+    def _filtered(self, keep):
+        counts = np.add.reduceat(keep, self.offsets[:-1]) if len(self) else np.zeros(0, dtype=np.int64)
+        offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return ContourStore(self.points[keep], offsets, self.source_bytes, self.source_segments)
+
+    def _approx_poly(self, tolerance):
+        """Douglas-Peucker per contour, treating each contour as an open curve."""
+        pieces = [cv2.approxPolyDP(self.contour(k).astype(np.int32), tolerance, False).reshape(-1, 2)
+                  for k in range(len(self))]
+        counts = np.array([len(p) for p in pieces], dtype=np.int64)
+        offsets = np.zeros(len(pieces) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        points = np.concatenate(pieces).astype(self.points.dtype) if pieces else self.points[:0]
+        return ContourStore(points, offsets, self.source_bytes, self.source_segments)
+
+
+def _coord_dtype(points):
+    """int16 if every coordinate fits, else int32."""
+    if len(points) and (points.min() < np.iinfo(np.int16).min or points.max() > np.iinfo(np.int16).max):
+        return np.int32
+    return np.int16
+
+
+class SegmentPlan:
+    """Every segment of a sorted contour list, compiled into flat arrays.
+
+    Segment s runs from starts[s] to ends[s] and belongs to contour
+    contour_ids[s]. Contour k owns segments offsets[k]:offsets[k + 1], so the
+    whole drawing can be walked with a single integer cursor. cum_length[s]
+    is the drawn length before segment s, which gives progress for free.
+
+    contours may be a list or a ContourStore; points is the store's packed
+    buffer, shared rather than copied.
+    """
+
+    @traced("SegmentPlan build")
+    def __init__(self, contours, source_img=None):
+        store = ContourStore.from_contours(contours)
+        seg_counts = np.maximum(np.diff(store.offsets) - 1, 0)
+
+        self.offsets = np.zeros(len(store) + 1, dtype=np.int64)
+        np.cumsum(seg_counts, out=self.offsets[1:])
+
+        self.points = store.points
+        self.contour_ids = np.repeat(np.arange(len(store), dtype=np.int64), seg_counts)
+
+        # Segment s starts at point s + contour_ids[s] (each contour has one more point than segments)
+        first = np.arange(len(self.contour_ids), dtype=np.int64) + self.contour_ids
+        self.starts = self.points[first]
+        self.ends = self.points[first + 1]
+
+        # Colors sampled at each segment midpoint, precomputed for "Use Sampled Color"
+        self.colors = None
+        if source_img is not None:
+            # Widen first: points may be int16, and x + x overflows it above 16383
+            mids = (self.starts.astype(np.int32) + self.ends) // 2
+            self.colors = source_img[mids[:, 1], mids[:, 0]]
+
+        lengths = np.hypot(*(self.ends.astype(np.float64) - self.starts).T)
+        self.cum_length = np.zeros(len(lengths) + 1)
+        np.cumsum(lengths, out=self.cum_length[1:])
+
+    PLAN_ARRAYS = ("offsets", "contour_ids", "starts", "ends", "cum_length", "colors")
+
+    def to_arrays(self):
+        """The compiled arrays besides points, for saving (see from_arrays). colors may be None."""
+        return {name: getattr(self, name) for name in self.PLAN_ARRAYS}
+
+    @classmethod
+    def from_arrays(cls, points, arrays):
+        """Rebuilds a plan from points and to_arrays() output without recompiling (e.g. memory maps)."""
+        plan = cls.__new__(cls)
+        plan.points = points
+        for name in cls.PLAN_ARRAYS:
+            setattr(plan, name, arrays.get(name))
+        return plan
+
+    def __len__(self):
+        return len(self.contour_ids)
+
+    @property
+    def num_contours(self):
+        return len(self.offsets) - 1
+
+    @property
+    def total_length(self):
+        return float(self.cum_length[-1])
+
+    def locate(self, cursor):
+        """Maps a cursor to (contour, point), the old current_contour/current_point pair."""
+        if cursor >= len(self):
+            return self.num_contours, 0
+        contour = int(self.contour_ids[cursor])
+        return contour, int(cursor - self.offsets[contour])
+
+    def cursor_at(self, contour, point=0):
+        """Maps (contour, point) back to a cursor."""
+        if contour >= self.num_contours:
+            return len(self)
+        return int(min(self.offsets[contour] + point, self.offsets[contour + 1]))
+
+    def progress(self, cursor):
+        """Fraction of the total drawn length covered before the cursor."""
+        if self.total_length == 0:
+            return 1.0 if cursor >= len(self) else 0.0
+        return float(self.cum_length[min(cursor, len(self))]) / self.total_length
+
+    def seek(self, fraction):
+        """Returns the cursor at which the given fraction of the length has been drawn."""
+        target = max(0.0, min(1.0, fraction)) * self.total_length
+        return int(np.searchsorted(self.cum_length, target, side="left"))
+
+    def bbox(self, start, stop):
+        """Inclusive (x0, y0, x1, y1) box around segments start:stop, or None if empty."""
+        if stop <= start:
+            return None
+        pts = np.concatenate((self.starts[start:stop], self.ends[start:stop]))
+        x0, y0 = pts.min(axis=0)
+        x1, y1 = pts.max(axis=0)
+        return int(x0), int(y0), int(x1), int(y1)
+
+    def runs(self, start, stop, use_sampling=False):
+        """Splits segments start:stop into polyline runs, in drawing order.
+
+        A run is a stretch of one contour drawn as a single polyline: the whole
+        stretch, or (with use_sampling) consecutive segments sharing a sampled
+        color. Returns (first, last, colors): run k spans
+        points[first[k]:last[k] + 1], and colors is None unless sampling.
+        """
+        stop = min(stop, len(self))
+        if stop <= start:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, None
+
+        ids = self.contour_ids[start:stop]
+        if use_sampling and self.colors is not None:
+            colors = self.colors[start:stop]
+            # Segment s + 1 continues the run of segment s if it is in the same contour and color
+            same = (ids[1:] == ids[:-1]) & (colors[1:] == colors[:-1]).all(axis=1)
+        else:
+            colors = None
+            same = ids[1:] == ids[:-1]
+
+        run_starts = np.flatnonzero(~np.concatenate(([False], same)))
+        run_stops = np.flatnonzero(~np.concatenate((same, [False])))
+
+        # Point index of each run's first point; a run of n segments spans n + 1 points
+        first = run_starts + start + ids[run_starts]
+        last = run_stops + start + ids[run_stops] + 1
+        return first, last, None if colors is None else colors[run_starts]
+
+    def run_bboxes(self, first, last):
+        """Inclusive (x0, y0, x1, y1) box of every run, as a (K, 4) array."""
+        if len(first) == 0:
+            return np.zeros((0, 4), dtype=np.int32)
+        pts = self.points[:last[-1] + 1]
+        # reduceat covers first[k]:first[k + 1]; the shared last point is folded in separately
+        lo = np.minimum(np.minimum.reduceat(pts, first), pts[last])
+        hi = np.maximum(np.maximum.reduceat(pts, first), pts[last])
+        # int32 like the empty case, so tile tests such as px1 + thickness never overflow int16
+        return np.hstack((lo, hi)).astype(np.int32)
+
+    def draw_runs(self, canvas, first, last, colors, thickness, line_color, origin=None,
+                  line_type=cv2.LINE_8, scale=1):
+        """Draws runs from runs(); origin (x, y) shifts them for drawing into a tile.
+
+        With scale > 1 the canvas is a supersampled one: points land on the
+        centers of their scale x scale pixel blocks, origin is in canvas pixels
+        and thickness should already be scaled.
+        """
+        if len(first) == 0:
+            return canvas
+        # cv2.polylines wants int32, so widen just the span being drawn
+        base = int(first.min())
+        pts = self.points[base:int(last.max()) + 1].astype(np.int32)
+        shift = 0
+        if scale > 1:
+            # One fractional bit puts points at block centers: (x + 0.5) * scale - 0.5
+            pts = pts * (2 * scale) + (scale - 1)
+            shift = 1
+        if origin is not None:
+            pts -= np.array(origin, dtype=np.int32) << shift
+        runs = [pts[a:b + 1] for a, b in zip((first - base).tolist(), (last - base).tolist())]
+
+        if colors is None:
+            cv2.polylines(canvas, runs, False, line_color, thickness, line_type, shift)
+        else:
+            for run, color in zip(runs, colors.tolist()):
+                cv2.polylines(canvas, [run], False, color, thickness, line_type, shift)
+
+        return canvas
+
+    def draw(self, canvas, start, stop, thickness, line_color, use_sampling=False, line_type=cv2.LINE_8):
+        """Draws segments start:stop onto the canvas.
+
+        Segments are drawn with cv2.polylines instead of one cv2.line per
+        segment. An open polyline rasterizes exactly like its segments drawn one
+        by one, so the output is pixel-identical. Sampled colors are drawn as runs
+        of consecutive same-colored segments, which keeps the original overdraw
+        order.
+        """
+        with TRACER.span("draw segments", segments=max(0, min(stop, len(self)) - start)):
+            first, last, colors = self.runs(start, stop, use_sampling)
+            if len(first):
+                self.draw_runs(canvas, first, last, colors, thickness, line_color, line_type=line_type)
+        return canvas
+
+
+class FrameScheduler:
+    """Decides how many segments each animation frame draws.
+
+    Three modes:
+        fixed     a constant number of steps per frame (the Speed entry)
+        adaptive  fill a share of TARGET_FRAME_TIME, sized from the measured
+                  cost per segment plus the display refresh cost
+        paced     spread the whole plan over a fixed duration, so playback
+                  takes the same time whatever the segment count
+    """
+
+    INITIAL_STEPS = 500
+    MAX_GROWTH = 4       # Adaptive frames grow at most this much per frame
+    SMOOTHING = 0.3      # Weight of the newest sample in the moving averages
+    DEFAULT_SEGMENT_COST = 1e-6  # Seconds per segment assumed before the first frame is measured
+    FIXED_FRAME_OVERHEAD = 0.002 # after(1) plus Tk event handling between fixed-mode frames
+
+    def __init__(self, target_frame=TARGET_FRAME_TIME, work_fraction=FRAME_WORK_FRACTION):
+        self.target_frame = target_frame
+        self.work_fraction = work_fraction
+        self.mode = "fixed"
+        self.fixed_steps = self.INITIAL_STEPS
+        self.steps = self.INITIAL_STEPS
+        self.segment_cost = None   # Seconds per segment (moving average)
+        self.display_cost = 0.0    # Seconds per display refresh (moving average)
+        self.rate = 0.0            # Segments per second in paced mode
+        self.total = 0
+        self.base = 0
+        self.t0 = 0.0
+
+    def start(self, total, done=0, mode="fixed", steps=INITIAL_STEPS, duration=None, now=None):
+        """Begins (or resumes) playback with done of total segments already drawn.
+
+        In paced mode, duration is the time for the whole plan; a resumed run
+        keeps the same pace, so it finishes in the remaining share of it.
+        """
+        self.mode = mode
+        self.fixed_steps = max(1, steps)
+        self.t0 = time.perf_counter() if now is None else now
+        self.base = done
+        self.total = total
+        self.rate = total / duration if mode == "paced" and duration else 0.0
+        if mode == "paced" and not self.rate:
+            self.mode = "adaptive"
+
+    def next_steps(self, cursor, now=None):
+        """Returns how many segments to draw from cursor this frame (0 means wait)."""
+        remaining = max(0, self.total - cursor)
+        if self.mode == "fixed":
+            return min(self.fixed_steps, remaining)
+        if self.mode == "paced":
+            now = time.perf_counter() if now is None else now
+            due = self.base + int((now - self.t0) * self.rate)
+            return min(max(0, due - cursor), remaining)
+
+        budget = self.target_frame * self.work_fraction - self.display_cost
+        if self.segment_cost:
+            wanted = int(max(budget, 0) / self.segment_cost)
+            self.steps = max(1, min(wanted, self.steps * self.MAX_GROWTH))
+        return min(self.steps, remaining)
+
+    def record(self, segments, draw_seconds, display_seconds=None):
+        """Feeds back the measured cost of a frame."""
+        a = self.SMOOTHING
+        if segments > 0 and draw_seconds > 0:
+            cost = draw_seconds / segments
+            self.segment_cost = cost if self.segment_cost is None else a * cost + (1 - a) * self.segment_cost
+        if display_seconds is not None:
+            self.display_cost = a * display_seconds + (1 - a) * self.display_cost
+
+    def delay_ms(self, frame_start, now=None):
+        """Milliseconds to wait before the next frame, keeping the target frame rate."""
+        if self.mode == "fixed":
+            return 1
+        now = time.perf_counter() if now is None else now
+        return max(1, int((self.target_frame - (now - frame_start)) * 1000))
+
+    def expected_duration(self, cursor):
+        """Estimated seconds to draw from cursor to the end in the current mode."""
+        remaining = max(0, self.total - cursor)
+        if self.mode == "paced":
+            return remaining / self.rate
+        cost = self.segment_cost or self.DEFAULT_SEGMENT_COST
+        if self.mode == "adaptive":
+            return max(remaining * cost / self.work_fraction, self.target_frame)
+        frames = -(-remaining // self.fixed_steps)
+        return remaining * cost + frames * self.FIXED_FRAME_OVERHEAD
+
+    def eta(self, now=None):
+        """Seconds left in paced mode, or None."""
+        if self.mode != "paced":
+            return None
+        now = time.perf_counter() if now is None else now
+        return max(0.0, (self.total - self.base) / self.rate - (now - self.t0))
+
+
+def tile_grid(width, height, tile_size):
+    """Yields (row, col, (x0, y0, x1, y1)) for tiles covering a width x height image."""
+    for row, y0 in enumerate(range(0, height, tile_size)):
+        for col, x0 in enumerate(range(0, width, tile_size)):
+            yield row, col, (x0, y0, min(x0 + tile_size, width), min(y0 + tile_size, height))
+
+
+def tile_padding(box, canvas_size, thickness):
+    """The tile box grown by a margin on its interior sides, clamped to the canvas.
+
+    Drawing into the padded box keeps stroke ends and caps of short
+    segments away from the buffer edge.
+    """
+    x0, y0, x1, y1 = box
+    width, height = canvas_size
+    pad = thickness + 2
+    return ((x0 - pad if x0 > 0 else 0), (y0 - pad if y0 > 0 else 0),
+            (x1 + pad if x1 < width else width), (y1 + pad if y1 < height else height))
+
+
+def tile_draw_box(plan, runs, bboxes, box, canvas_size, thickness):
+    """The box to draw a tile in: tile_padding() grown to hold every segment reaching the tile whole.
+
+    cv2 clips a line to the image before rasterizing it, and a clipped long
+    line can step differently from the unclipped one. Contour points always
+    lie on the canvas, so a full-canvas draw never clips; drawing every
+    segment that can reach the tile unclipped makes the tile match it exactly.
+    """
+    first, last, _ = runs
+    px0, py0, px1, py1 = tile_padding(box, canvas_size, thickness)
+    sel = ((bboxes[:, 0] < px1 + thickness) & (bboxes[:, 2] >= px0 - thickness) &
+           (bboxes[:, 1] < py1 + thickness) & (bboxes[:, 3] >= py0 - thickness))
+    if not sel.any():
+        return px0, py0, px1, py1
+
+    # Start point of every segment in the selected runs
+    counts = last[sel] - first[sel]
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    seg = np.arange(offsets[-1]) - np.repeat(offsets[:-1] - first[sel], counts)
+    a, b = plan.points[seg].astype(np.int32), plan.points[seg + 1].astype(np.int32)
+    lo, hi = np.minimum(a, b), np.maximum(a, b)
+
+    x0, y0, x1, y1 = box
+    margin = thickness + 2
+    reach = ((lo[:, 0] < x1 + margin) & (hi[:, 0] >= x0 - margin) &
+             (lo[:, 1] < y1 + margin) & (hi[:, 1] >= y0 - margin))
+    if not reach.any():
+        return px0, py0, px1, py1
+    sx0, sy0 = lo[reach].min(axis=0) - margin
+    sx1, sy1 = hi[reach].max(axis=0) + margin + 1
+    width, height = canvas_size
+    return (max(0, min(px0, int(sx0))), max(0, min(py0, int(sy0))),
+            min(width, max(px1, int(sx1))), min(height, max(py1, int(sy1))))
+
+
+def rasterize_tile(plan, runs, bboxes, base, box, padded, thickness, line_color,
+                   line_type=cv2.LINE_8, scale=1):
+    """Draws the runs touching a tile onto base and returns the tile's pixels.
+
+    base is the padded box's current pixels (a copy; it is drawn on). With
+    scale > 1 it is upscaled, drawn at scale x resolution and area-averaged
+    back down (supersampling).
+    """
+    first, last, colors = runs
+    x0, y0, x1, y1 = box
+    px0, py0, px1, py1 = padded
+
+    sel = ((bboxes[:, 0] < px1 + thickness) & (bboxes[:, 2] >= px0 - thickness) &
+           (bboxes[:, 1] < py1 + thickness) & (bboxes[:, 3] >= py0 - thickness))
+    if sel.any():
+        target = base
+        if scale > 1:
+            target = cv2.resize(base, None, fx=scale, fy=scale, interpolation=cv2.INTER_NEAREST)
+        plan.draw_runs(target, first[sel], last[sel], None if colors is None else colors[sel],
+                       thickness * scale, line_color, origin=(px0 * scale, py0 * scale),
+                       line_type=line_type, scale=scale)
+        if scale > 1:
+            base = cv2.resize(target, (px1 - px0, py1 - py0), interpolation=cv2.INTER_AREA)
+
+    return base[y0 - py0:y1 - py0, x0 - px0:x1 - px0]
+
+
+def render_tile(plan, runs, bboxes, box, canvas_size, thickness, line_color, bg_color,
+                line_type=cv2.LINE_8, scale=1):
+    """Renders one tile of a canvas_size (w, h) canvas from precomputed runs.
+
+    runs is (first, last, colors) from plan.runs() and bboxes the matching
+    plan.run_bboxes(). Only runs touching the tile are drawn.
+    """
+    padded = tile_draw_box(plan, runs, bboxes, box, canvas_size, thickness)
+    px0, py0, px1, py1 = padded
+    base = new_canvas((py1 - py0, px1 - px0), bg_color)
+    return rasterize_tile(plan, runs, bboxes, base, box, padded, thickness, line_color, line_type, scale)
+
+
+def render_contours(canvas, contours, thickness, line_color, source_img=None,
+                    start_contour=0, start_point=0, line_type=cv2.LINE_8, supersample=1):
+    """Draws contours onto the canvas, resuming from (start_contour, start_point).
+
+    If source_img is given, each segment is colored by sampling it at the
+    segment midpoint; otherwise line_color is used. line_type=cv2.LINE_AA
+    anti-aliases; supersample > 1 draws at that many times the resolution and
+    averages down.
+    """
+    plan = SegmentPlan(contours, source_img)
+    start = plan.cursor_at(start_contour, start_point)
+    use_sampling = source_img is not None
+    if supersample > 1:
+        runs = plan.runs(start, len(plan), use_sampling)
+        bboxes = plan.run_bboxes(runs[0], runs[1])
+        box = (0, 0, canvas.shape[1], canvas.shape[0])
+        canvas[:] = rasterize_tile(plan, runs, bboxes, canvas.copy(), box, box, thickness, line_color,
+                                   line_type, supersample)
+    else:
+        plan.draw(canvas, start, len(plan), thickness, line_color, use_sampling, line_type)
+    return canvas
+
+
+def vectorize(img, low_thresh=DEFAULT_CANNY_LOW, high_thresh=DEFAULT_CANNY_HIGH,
+              min_len=DEFAULT_MIN_CONTOUR, thickness=DEFAULT_LINE_THICKNESS,
+              bg_color=BLACK_BG[0], line_color=BLACK_BG[1], use_sampling=False,
+              simplify="none", tolerance=DEFAULT_SIMPLIFY_TOLERANCE, line_type=cv2.LINE_8, supersample=1):
+    """Runs the whole pipeline headlessly. Returns (canvas, contours) with contours as a ContourStore."""
+    _, contours = extract_contours(img, low_thresh, high_thresh, min_len)
+    contours = ContourStore.from_contours(contours, simplify, tolerance)
+    canvas = new_canvas(img.shape, bg_color)
+    render_contours(canvas, contours, thickness, line_color, source_img=img if use_sampling else None,
+                    line_type=line_type, supersample=supersample)
+    return canvas, contours
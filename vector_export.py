@@ -0,0 +1,245 @@
+"""Vector export of the drawing to SVG or PDF.
+
+The segment plan is written as path data while it is being formatted, a
+chunk of runs at a time, so memory stays flat however many segments there
+are. Output size is kept down in three ways:
+
+- Merging: every stroke of one color goes into a single path element. With
+  sampled colors, runs are grouped by color (merge_colors), or only
+  neighbouring runs of the same color are joined, which keeps the drawing
+  order where strokes of different colors overlap.
+- Integer compaction: coordinates are written as integers. SVG subpaths use
+  relative moves and implicit relative line-tos ("m3 1 1 0 1-1"), so chain
+  steps cost a few bytes each. PDF content streams are Flate-compressed as
+  they are written.
+- Simplification: --simplify dp --tolerance T applies Douglas-Peucker before
+  export (--simplify chain is lossless for thin lines).
+
+Example:
+    python vector_export.py photo.jpg -o photo.svg --simplify dp --tolerance 1.5
+    python vector_export.py photo.jpg -o photo.pdf --sampled-color
+"""
+import argparse
+import os
+import sys
+import time
+import zlib
+
+import numpy as np
+
+import vector_batch
+import vector_core
+
+FORMATS = (".svg", ".pdf")
+CHUNK_RUNS = 4096   # Runs formatted per write
+PDF_COMPRESSION = 1 # zlib level; higher levels are several times slower for a few percent
+
+
+def color_groups(plan, use_sampling=False, merge_colors=True, line_color=(0, 255, 0)):
+    """The plan's runs in output order, split into one path per color.
+
+    Returns (first, last, colors, new_path): run k spans
+    points[first[k]:last[k] + 1] and, where new_path[k], starts a new path
+    stroked in BGR colors[k].
+    """
+    first, last, colors = plan.runs(0, len(plan), use_sampling)
+    if colors is None:
+        colors = np.broadcast_to(np.array(line_color, dtype=np.uint8), (len(first), 3))
+        new_path = np.zeros(len(first), dtype=bool)
+        new_path[:1] = True
+        return first, last, colors, new_path
+
+    if merge_colors:
+        # One path per distinct color; runs keep their drawing order within it
+        key = (colors[:, 0].astype(np.int32) << 16) | (colors[:, 1].astype(np.int32) << 8) | colors[:, 2]
+        order = np.argsort(key, kind="stable")
+        first, last, colors = first[order], last[order], colors[order]
+    # Otherwise only neighbouring runs of one color share a path
+    new_path = np.concatenate(([True], (colors[1:] != colors[:-1]).any(axis=1)))
+    return first, last, colors, new_path
+
+
+def run_points(points, first, last):
+    """Points of runs first[k]..last[k] back to back, plus where each run starts among them."""
+    lengths = last - first + 1
+    starts = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=starts[1:])
+    idx = np.arange(starts[-1]) - np.repeat(starts[:-1] - first, lengths)
+    return points[idx].astype(np.int64), starts
+
+
+def hex_color(bgr):
+    b, g, r = bgr
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+class SvgWriter:
+    """Streams runs into an SVG document, one <path> per color group."""
+
+    def __init__(self, f, size, bg_color, thickness, compact=True):
+        self.f = f
+        self.compact = compact
+        self.pen = np.zeros(2, dtype=np.int64)
+        self.path_open = False
+        width, height = size
+        f.write(f'<?xml version="1.0" encoding="UTF-8"?>\n'
+                f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+                f'viewBox="0 0 {width} {height}">\n'
+                f'<rect width="100%" height="100%" fill="{hex_color(bg_color)}"/>\n'
+                # Integer coordinates are pixel centers, as in cv2.line
+                f'<g fill="none" stroke-width="{thickness}" stroke-linecap="round" stroke-linejoin="round" '
+                f'transform="translate(.5 .5)">\n')
+
+    def add_runs(self, points, first, last, colors, new_path):
+        pts, starts = run_points(points, first, last)
+        if self.compact:
+            # Each point relative to the one before; run starts become relative moves
+            values = np.diff(pts, axis=0, prepend=self.pen[None])
+            # The first m of a path is absolute, i.e. relative to the origin
+            values[starts[:-1][new_path]] = pts[starts[:-1][new_path]]
+            self.pen[:] = pts[-1]
+            cmd = "m"
+        else:
+            values, cmd = pts, "M"
+        nums = list(map(str, values.ravel().tolist()))
+
+        parts = []
+        colors = colors.tolist()
+        for k, (a, b) in enumerate(zip(starts[:-1].tolist(), starts[1:].tolist())):
+            if new_path[k]:
+                parts.append(f'{self._close_path()}<path stroke="{hex_color(colors[k])}" d="')
+                self.path_open = True
+            # After a move, further coordinate pairs are implicit line-tos
+            parts.append(cmd + " ".join(nums[2 * a:2 * b]))
+        text = "".join(parts)
+        self.f.write(text.replace(" -", "-") if self.compact else text)
+
+    def _close_path(self):
+        return '"/>\n' if self.path_open else ""
+
+    def close(self):
+        self.f.write(self._close_path() + "</g>\n</svg>\n")
+
+
+class PdfWriter:
+    """Streams runs into a one-page PDF, stroked per color group and per chunk.
+
+    The page content is a single stream written through zlib as it grows.
+    Its length is only known at the end, so it is stored as an indirect
+    object after the stream.
+    """
+
+    def __init__(self, f, size, bg_color, thickness, compact=True):
+        self.f = f
+        self.offsets = []
+        self.compressor = zlib.compressobj(PDF_COMPRESSION) if compact else None
+        width, height = size
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(b"<< /Type /Catalog /Pages 2 0 R >>")
+        self._object(b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>")
+        self._object(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width} {height}] "
+                     f"/Contents 4 0 R /Resources << >> >>".encode())
+        self.offsets.append(f.tell())
+        filter_entry = " /Filter /FlateDecode" if compact else ""
+        f.write(f"4 0 obj\n<< /Length 5 0 R{filter_entry} >>\nstream\n".encode())
+        self.stream_start = f.tell()
+
+        # Background, then flip to image coordinates with integers on pixel centers
+        self._content(f"{self._rgb(bg_color)} rg 0 0 {width} {height} re f\n"
+                      f"1 0 0 -1 0.5 {height - 0.5} cm 1 J 1 j {thickness} w\n")
+
+    @staticmethod
+    def _rgb(bgr):
+        b, g, r = bgr
+        return f"{r / 255:.3g} {g / 255:.3g} {b / 255:.3g}"
+
+    def _object(self, body):
+        self.offsets.append(self.f.tell())
+        self.f.write(f"{len(self.offsets)} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    def _content(self, text):
+        data = text.encode()
+        self.f.write(self.compressor.compress(data) if self.compressor else data)
+
+    def add_runs(self, points, first, last, colors, new_path):
+        pts, starts = run_points(points, first, last)
+        coords = list(map(" ".join, zip(map(str, pts[:, 0].tolist()), map(str, pts[:, 1].tolist()))))
+        parts = []
+        colors = colors.tolist()
+        for k, (a, b) in enumerate(zip(starts[:-1].tolist(), starts[1:].tolist())):
+            if new_path[k]:
+                # Paint what is pending before switching color
+                parts.append(f"{'S ' if k else ''}{self._rgb(colors[k])} RG\n")
+            parts.append(f"{coords[a]} m {' l '.join(coords[a + 1:b])} l\n")
+        parts.append("S\n")
+        self._content("".join(parts))
+
+    def close(self):
+        if self.compressor:
+            self.f.write(self.compressor.flush())
+        length = self.f.tell() - self.stream_start
+        self.f.write(b"\nendstream\nendobj\n")
+        self._object(str(length).encode())
+
+        xref = self.f.tell()
+        self.f.write(f"xref\n0 {len(self.offsets) + 1}\n0000000000 65535 f \n".encode())
+        for offset in self.offsets:
+            self.f.write(f"{offset:010d} 00000 n \n".encode())
+        self.f.write(f"trailer\n<< /Size {len(self.offsets) + 1} /Root 1 0 R >>\n"
+                     f"startxref\n{xref}\n%%EOF\n".encode())
+
+
+def export_vector(path, plan, size, thickness=vector_core.DEFAULT_LINE_THICKNESS, line_color=(0, 255, 0),
+                  bg_color=(0, 0, 0), use_sampling=False, merge_colors=True, compact=True):
+    """Writes plan to .svg or .pdf. Returns stats: paths, segments, bytes and seconds."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"unsupported vector format {ext!r} (use .svg or .pdf)")
+
+    start = time.perf_counter()
+    first, last, colors, new_path = color_groups(plan, use_sampling, merge_colors, line_color)
+    with open(path, "w" if ext == ".svg" else "wb") as f:
+        writer = (SvgWriter if ext == ".svg" else PdfWriter)(f, size, bg_color, thickness, compact)
+        for k in range(0, len(first), CHUNK_RUNS):
+            chunk = slice(k, k + CHUNK_RUNS)
+            writer.add_runs(plan.points, first[chunk], last[chunk], colors[chunk], new_path[chunk])
+        writer.close()
+    return {"paths": int(new_path.sum()), "segments": len(plan), "bytes": os.path.getsize(path),
+            "seconds": time.perf_counter() - start}
+
+
+def format_stats(stats):
+    return (f"{stats['paths']:,} paths, {stats['segments']:,} segments, "
+            f"{vector_core.format_bytes(stats['bytes'])} in {stats['seconds']:.2f} s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export an image's drawing as SVG or PDF.")
+    parser.add_argument("input", help="Input image.")
+    parser.add_argument("-o", "--output", required=True, help="Output file (.svg or .pdf).")
+    parser.add_argument("--no-merge", action="store_true",
+                        help="With --sampled-color, only join neighbouring runs of one color (keeps overlap order).")
+    parser.add_argument("--no-compact", action="store_true",
+                        help="Absolute SVG coordinates and an uncompressed PDF stream, for reading or diffing.")
+    vector_batch.add_pipeline_args(parser)
+    args = parser.parse_args(argv)
+    params = vector_batch.params_from_args(args)
+
+    loaded = vector_batch.load_plan(args.input, params)
+    if loaded is None:
+        print(f"Could not read {args.input}", file=sys.stderr)
+        return 1
+    img, _, contours, plan = loaded
+
+    try:
+        stats = export_vector(args.output, plan, img.shape[1::-1], params["thickness"], params["line_color"],
+                              params["bg_color"], params["sampled_color"], not args.no_merge, not args.no_compact)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"Wrote {args.output}: {format_stats(stats)} ({contours.report()})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
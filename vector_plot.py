@@ -0,0 +1,299 @@
+"""Pen-plotter output: travel-minimizing stroke ordering plus G-code/HPGL export.
+
+The GUI orders contours by area, which ignores where each stroke starts and
+ends. For a plotter, pen-up travel between strokes dominates job time, so this
+module reorders them:
+
+1. Greedy chaining: from the pen position, pick the contour with the nearest
+   endpoint (either end, reversing the contour if its last point is nearer),
+   using a uniform grid over endpoints so each lookup is local.
+2. Optional 2-opt: reverse whole runs of strokes when that shortens travel,
+   until no improvement is left or the time budget runs out.
+
+Travel is measured from the plotter's home position and back to it. The
+writers flip Y so the plot is upright, which puts home (X0 Y0) at pixel
+(0, height), the bottom-left corner of the image.
+
+Example:
+    python vector_plot.py photo.jpg -o photo.gcode --scale 0.25 --opt-time 5
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+import vector_batch
+import vector_core
+
+DEFAULT_OPT_TIME = 2.0      # Seconds allowed for the 2-opt pass
+DEFAULT_SCALE = 0.25        # Millimetres per pixel
+HPGL_UNITS_PER_MM = 40      # HPGL plotter units are 0.025 mm
+HPGL_POINTS_PER_PD = 64     # Coordinates per PD command, to keep lines short
+
+
+class EndpointGrid:
+    """Uniform grid over contour endpoints for nearest-endpoint queries."""
+
+    def __init__(self, starts, ends, cell_size):
+        self.cell_size = cell_size
+        self.cells = defaultdict(set)  # (cx, cy) -> {(contour, end)}
+        self.points = {}               # (contour, end) -> (x, y)
+        for i, (s, e) in enumerate(zip(starts.tolist(), ends.tolist())):
+            self._add((i, 0), s)
+            self._add((i, 1), e)
+        # Cell bounds, so a search knows when it has covered every occupied cell
+        cells = list(self.cells) or [(0, 0)]
+        xs, ys = zip(*cells)
+        self.bounds = (min(xs), min(ys), max(xs), max(ys))
+
+    def _cell(self, pt):
+        return int(pt[0] // self.cell_size), int(pt[1] // self.cell_size)
+
+    def _add(self, key, pt):
+        self.points[key] = pt
+        self.cells[self._cell(pt)].add(key)
+
+    def remove(self, contour):
+        """Removes both endpoints of a contour."""
+        for key in ((contour, 0), (contour, 1)):
+            pt = self.points.pop(key)
+            self.cells[self._cell(pt)].discard(key)
+
+    def _ring(self, cx, cy, ring):
+        """Yields the cells at Chebyshev distance ring from (cx, cy)."""
+        if ring == 0:
+            yield cx, cy
+            return
+        for gx in range(cx - ring, cx + ring + 1):
+            yield gx, cy - ring
+            yield gx, cy + ring
+        for gy in range(cy - ring + 1, cy + ring):
+            yield cx - ring, gy
+            yield cx + ring, gy
+
+    def nearest(self, pt):
+        """Returns the (contour, end) nearest to pt, or None if the grid is empty."""
+        if not self.points:
+            return None
+
+        cx, cy = self._cell(pt)
+        x0, y0, x1, y1 = self.bounds
+        last_ring = max(abs(cx - x0), abs(cx - x1), abs(cy - y0), abs(cy - y1))
+
+        best, best_dist = None, math.inf
+        for ring in range(last_ring + 1):
+            # Everything in this ring or beyond is at least (ring - 1) cells away
+            if best is not None and best_dist <= (ring - 1) * self.cell_size:
+                break
+            for cell in self._ring(cx, cy, ring):
+                for key in self.cells.get(cell, ()):
+                    px, py = self.points[key]
+                    dist = math.hypot(px - pt[0], py - pt[1])
+                    if dist < best_dist:
+                        best, best_dist = key, dist
+        return best
+
+
+def endpoints(contours):
+    """Returns (starts, ends) as (N, 2) float arrays."""
+    if isinstance(contours, vector_core.ContourStore):
+        # Read straight from the packed buffer
+        starts = contours.points[contours.offsets[:-1]].astype(np.float64)
+        ends = contours.points[contours.offsets[1:] - 1].astype(np.float64)
+        return starts, ends
+    if not contours:
+        empty = np.zeros((0, 2))
+        return empty, empty
+    starts = np.array([c[0][0] for c in contours], dtype=np.float64)
+    ends = np.array([c[-1][0] for c in contours], dtype=np.float64)
+    return starts, ends
+
+
+def greedy_order(contours, home=(0, 0)):
+    """Chains contours by nearest endpoint. Returns (order, flipped) lists."""
+    starts, ends = endpoints(contours)
+    if not contours:
+        return [], []
+
+    # Aim for a couple of endpoints per cell
+    span = max(np.ptp(np.vstack((starts, ends)), axis=0).max(), 1.0)
+    cell_size = max(span / math.sqrt(len(contours)), 1.0)
+    grid = EndpointGrid(starts, ends, cell_size)
+
+    order, flipped = [], []
+    pen = home
+    while True:
+        hit = grid.nearest(pen)
+        if hit is None:
+            break
+        i, end = hit
+        grid.remove(i)
+        order.append(i)
+        flipped.append(end == 1)  # Entering at the last point means drawing it backwards
+        pen = starts[i] if end == 1 else ends[i]
+    return order, flipped
+
+
+def two_opt(contours, order, flipped, home=(0, 0), time_budget=DEFAULT_OPT_TIME):
+    """Improves an ordering by reversing runs of strokes. Returns (order, flipped)."""
+    n = len(order)
+    if n < 2 or time_budget <= 0:
+        return list(order), list(flipped)
+
+    starts, ends = endpoints(contours)
+    order = np.array(order)
+    flipped = np.array(flipped, dtype=bool)
+    # Pen-down (S) and pen-up (E) points in drawing order
+    S = np.where(flipped[:, None], ends[order], starts[order])
+    E = np.where(flipped[:, None], starts[order], ends[order])
+    home = np.asarray(home, dtype=np.float64)
+
+    deadline = time.perf_counter() + time_budget
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(n - 1):
+            if time.perf_counter() >= deadline:
+                break
+            prev = E[i - 1] if i > 0 else home
+            j = np.arange(i + 1, n)
+            # Reversing i..j links prev -> E[j] and S[i] -> S[j + 1]; after the last stroke the pen goes home
+            nxt = np.vstack((S, home))[j + 1]
+            old = np.hypot(*(S[i] - prev)) + np.hypot(*(nxt - E[j]).T)
+            new = np.hypot(*(E[j] - prev).T) + np.hypot(*(nxt - S[i]).T)
+            delta = new - old
+            k = int(np.argmin(delta))
+            if delta[k] < -1e-9:
+                j = int(j[k])
+                S[i:j + 1], E[i:j + 1] = E[i:j + 1][::-1].copy(), S[i:j + 1][::-1].copy()
+                order[i:j + 1] = order[i:j + 1][::-1]
+                flipped[i:j + 1] = ~flipped[i:j + 1][::-1]
+                improved = True
+    return order.tolist(), flipped.tolist()
+
+
+def ordered_strokes(contours, order, flipped):
+    """Yields (N, 2) point arrays in drawing order and direction."""
+    for i, flip in zip(order, flipped):
+        pts = contours[i].reshape(-1, 2)
+        yield pts[::-1] if flip else pts
+
+
+def path_stats(strokes, home=(0, 0)):
+    """Returns (drawn, travel) distances in pixels for strokes drawn in order, from home and back."""
+    drawn = travel = 0.0
+    home = np.asarray(home, dtype=np.float64)
+    pen = home
+    for pts in strokes:
+        travel += float(np.hypot(*(pts[0] - pen)))
+        drawn += float(np.hypot(*np.diff(pts, axis=0).T).sum())
+        pen = pts[-1]
+    travel += float(np.hypot(*(home - pen)))
+    return drawn, travel
+
+
+def optimize(contours, home=(0, 0), time_budget=DEFAULT_OPT_TIME):
+    """Runs greedy chaining plus 2-opt. Returns (order, flipped, stats).
+
+    stats maps "original", "greedy" and "two_opt" to (drawn, travel) in pixels.
+    """
+    identity = list(range(len(contours)))
+    stats = {"original": path_stats(ordered_strokes(contours, identity, [False] * len(contours)), home)}
+
+    order, flipped = greedy_order(contours, home)
+    stats["greedy"] = path_stats(ordered_strokes(contours, order, flipped), home)
+
+    order, flipped = two_opt(contours, order, flipped, home, time_budget)
+    stats["two_opt"] = path_stats(ordered_strokes(contours, order, flipped), home)
+    return order, flipped, stats
+
+
+def write_gcode(f, strokes, height, scale, pen_up=5.0, pen_down=0.0, feed=3000):
+    """Streams strokes as G-code in millimetres, with the Y axis pointing up."""
+    f.write("G21 ; millimetres\nG90 ; absolute\n")
+    f.write(f"G0 Z{pen_up:.2f}\n")
+    for pts in strokes:
+        x, y = pts[0]
+        f.write(f"G0 X{x * scale:.3f} Y{(height - y) * scale:.3f}\n")
+        f.write(f"G1 Z{pen_down:.2f} F{feed}\n")
+        for x, y in pts[1:].tolist():
+            f.write(f"G1 X{x * scale:.3f} Y{(height - y) * scale:.3f}\n")
+        f.write(f"G0 Z{pen_up:.2f}\n")
+    f.write("G0 X0 Y0\n")
+
+
+def write_hpgl(f, strokes, height, scale):
+    """Streams strokes as HPGL (PU/PD), with the Y axis pointing up."""
+    units = scale * HPGL_UNITS_PER_MM
+    f.write("IN;SP1;\n")
+    for pts in strokes:
+        coords = [(round(x * units), round((height - y) * units)) for x, y in pts.tolist()]
+        f.write(f"PU{coords[0][0]},{coords[0][1]};\n")
+        for k in range(1, len(coords), HPGL_POINTS_PER_PD):
+            chunk = coords[k:k + HPGL_POINTS_PER_PD]
+            f.write("PD" + ",".join(f"{x},{y}" for x, y in chunk) + ";\n")
+    f.write("PU0,0;SP0;\n")
+
+
+def export_plot(path, contours, height, scale=DEFAULT_SCALE, optimize_order=True,
+                time_budget=DEFAULT_OPT_TIME):
+    """Writes contours to .gcode/.nc or .hpgl/.plt. Returns the optimize() stats."""
+    home = (0, height)  # X0 Y0 once Y is flipped
+    if optimize_order:
+        order, flipped, stats = optimize(contours, home, time_budget)
+    else:
+        order, flipped = list(range(len(contours))), [False] * len(contours)
+        stats = {"original": path_stats(ordered_strokes(contours, order, flipped), home)}
+
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, "w") as f:
+        strokes = ordered_strokes(contours, order, flipped)
+        if ext in (".hpgl", ".plt"):
+            write_hpgl(f, strokes, height, scale)
+        else:
+            write_gcode(f, strokes, height, scale)
+    return stats
+
+
+def format_stats(stats, scale=1.0, unit="px"):
+    """One line per ordering stage: drawn and travel distance."""
+    lines = []
+    for name, (drawn, travel) in stats.items():
+        lines.append(f"{name:>8}: drawn {drawn * scale:,.1f} {unit}, travel {travel * scale:,.1f} {unit}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export an image's contours for a pen plotter.")
+    parser.add_argument("input", help="Input image.")
+    parser.add_argument("-o", "--output", required=True, help="Output file (.gcode/.nc or .hpgl/.plt).")
+    parser.add_argument("--scale", type=float, default=DEFAULT_SCALE, help="Millimetres per pixel.")
+    parser.add_argument("--opt-time", type=float, default=DEFAULT_OPT_TIME,
+                        help="Time budget in seconds for the 2-opt pass (0 disables it).")
+    parser.add_argument("--no-optimize", action="store_true", help="Keep the area-sorted order.")
+    vector_batch.add_pipeline_args(parser)
+    args = parser.parse_args(argv)
+    params = vector_batch.params_from_args(args)
+
+    loaded = vector_batch.load_plan(args.input, params)
+    if loaded is None:
+        print(f"Could not read {args.input}", file=sys.stderr)
+        return 1
+    img, _, contours, _ = loaded
+
+    start = time.perf_counter()
+    stats = export_plot(args.output, contours, img.shape[0], args.scale,
+                        optimize_order=not args.no_optimize, time_budget=args.opt_time)
+    elapsed = time.perf_counter() - start
+
+    print(f"Wrote {len(contours)} strokes to {args.output} in {elapsed:.2f} s ({contours.report()})")
+    print(format_stats(stats, args.scale, "mm"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""Binary session files: save a drawing and reopen it without reprocessing.
+
+A session holds the resized input, the edge mask, the packed contours
+(ContourStore points and offsets), the compiled SegmentPlan arrays, the
+canvas drawn so far, the parameters, the color mode and the cursor. The
+layout is:
+
+    8 bytes   magic b"VECSESS" + format version
+    8 bytes   header length (little-endian uint64)
+    header    UTF-8 JSON: metadata plus {name: {dtype, shape, offset}} per array
+    arrays    raw C-order data, each starting on a 64-byte boundary
+
+Loading parses only the header and memory-maps the arrays. Nothing is
+recomputed, so a session with millions of points opens in milliseconds, and
+pages are read as drawing reaches them.
+
+Example:
+    python vector_session.py photo.jpg -o photo.vds --simplify chain
+    python vector_session.py photo.vds          # summary and load time
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+import vector_batch
+import vector_core
+
+MAGIC = b"VECSESS"
+VERSION = 1
+ALIGN = 64
+SESSION_EXT = ".vds"
+
+
+def save_session(path, input_img, contours, params, cursor=0, canvas=None, edges=None, meta=None, plan=None):
+    """Writes a session file. Replaces path atomically, so a failed save never leaves half a file.
+
+    contours is a ContourStore or a contour list. If plan is given, it must
+    have been built from that store. It is saved too, so loading skips
+    compiling it. params is a JSON-serializable dict (the vector_batch
+    parameter keys plus any GUI settings). meta holds other JSON data, such as
+    the source path.
+    """
+    store = vector_core.ContourStore.from_contours(contours)
+    arrays = {"input": input_img, "points": store.points, "offsets": store.offsets}
+    if canvas is not None:
+        arrays["canvas"] = canvas
+    if edges is not None:
+        arrays["edges"] = edges
+    if plan is not None:
+        # The plan shares the store's points, so only its own arrays are added
+        for name, arr in plan.to_arrays().items():
+            if arr is not None:
+                arrays["plan_" + name] = arr
+
+    header = {
+        "version": VERSION,
+        "params": params,
+        "cursor": int(cursor),
+        "source_bytes": int(store.source_bytes),
+        "source_segments": int(store.source_segments),
+        "meta": meta or {},
+        "arrays": {},
+    }
+    # Offsets depend on the header length, which depends on the offsets; lay out until stable
+    header_len = 0
+    while True:
+        offset = _align(16 + header_len)
+        for name, arr in arrays.items():
+            header["arrays"][name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+            offset = _align(offset + arr.nbytes)
+        encoded = json.dumps(header).encode("utf-8")
+        if len(encoded) == header_len:
+            break
+        header_len = len(encoded)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + bytes([VERSION]))
+        f.write(struct.pack("<Q", header_len))
+        f.write(encoded)
+        for name, arr in arrays.items():
+            f.seek(header["arrays"][name]["offset"])
+            f.write(np.ascontiguousarray(arr).tobytes())
+    os.replace(tmp_path, path)
+
+
+def load_session(path):
+    """Opens a session file. Returns a dict.
+
+    Keys are input, edges, canvas, contours, plan, params, cursor and meta.
+    Image arrays are copy-on-write maps, so the canvas can be drawn on without
+    touching the file. Contour and plan arrays are read-only maps. edges,
+    canvas and plan are None if they were not saved.
+    """
+    with open(path, "rb") as f:
+        magic = f.read(len(MAGIC) + 1)
+        if magic[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a session file")
+        if magic[-1] > VERSION:
+            raise ValueError(f"{path} uses session format {magic[-1]}; this version reads up to {VERSION}")
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_len).decode("utf-8"))
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        shape = tuple(spec["shape"])
+        if 0 in shape:
+            arrays[name] = np.zeros(shape, dtype=spec["dtype"])
+            continue
+        mode = "c" if name in ("input", "canvas", "edges") else "r"
+        # A plain ndarray view: np.memmap's own indexing is several times slower
+        arrays[name] = np.memmap(path, dtype=spec["dtype"], mode=mode, offset=spec["offset"],
+                                 shape=shape).view(np.ndarray)
+
+    contours = vector_core.ContourStore(arrays["points"], arrays["offsets"],
+                                        header["source_bytes"], header["source_segments"])
+    plan = None
+    if "plan_offsets" in arrays:
+        plan = vector_core.SegmentPlan.from_arrays(contours.points, {
+            name: arrays.get("plan_" + name) for name in vector_core.SegmentPlan.PLAN_ARRAYS})
+    params = dict(header["params"])
+    for key in ("bg_color", "line_color"):
+        if key in params:
+            params[key] = tuple(params[key])
+    return {
+        "input": arrays["input"],
+        "edges": arrays.get("edges"),
+        "canvas": arrays.get("canvas"),
+        "contours": contours,
+        "plan": plan,
+        "params": params,
+        "cursor": header["cursor"],
+        "meta": header["meta"],
+    }
+
+
+def _align(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create a session file from an image, or inspect one.")
+    parser.add_argument("input", help=f"Input image, or a {SESSION_EXT} file to inspect.")
+    parser.add_argument("-o", "--output", help=f"Output session file ({SESSION_EXT}).")
+    vector_batch.add_pipeline_args(parser)
+    args = parser.parse_args(argv)
+
+    if args.input.lower().endswith(SESSION_EXT):
+        start = time.perf_counter()
+        session = load_session(args.input)
+        plan = session["plan"] or vector_core.SegmentPlan(session["contours"])
+        elapsed = time.perf_counter() - start
+        store = session["contours"]
+        print(f"{args.input}: {len(store)} contours, {store.report()}, "
+              f"cursor {session['cursor']}/{len(plan)}, opened in {elapsed * 1000:.1f} ms")
+        print(json.dumps(session["params"]))
+        return 0
+
+    if not args.output:
+        parser.error("--output is required when creating a session")
+    params = vector_batch.params_from_args(args)
+    loaded = vector_batch.load_plan(args.input, params)
+    if loaded is None:
+        print(f"Could not read {args.input}", file=sys.stderr)
+        return 1
+    img, edges, contours, plan = loaded
+    canvas = vector_core.new_canvas(img.shape, params["bg_color"])
+    save_session(args.output, img, contours, params, 0, canvas, edges, {"source": args.input}, plan)
+    print(f"Wrote {args.output}: {len(contours)} contours, {contours.report()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
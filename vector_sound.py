@@ -0,0 +1,226 @@
+"""Pre-rendered sonification of the drawing.
+
+The tone follows the y-coordinate of the segment being drawn (high notes at
+the top of the image). The whole waveform is rendered up front with NumPy
+from the segment table, so playback is one asynchronous call and draw_step
+does no audio work. The result can also be saved as a WAV file on any platform.
+
+Playback uses winsound on Windows, afplay on macOS, and paplay or aplay on
+Linux. If none of them is available, only WAV export works.
+
+Example:
+    python vector_sound.py photo.jpg -o photo.wav --seconds 20
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import vector_batch
+
+try:
+    import winsound  # Windows only
+except ImportError:
+    winsound = None
+
+SAMPLE_RATE = 22050
+MIN_FREQ = 300              # Bottom of the image
+MAX_FREQ = 2000             # Top of the image
+NOTE_SECONDS = 0.015        # Each note holds one frequency, like the old 15 ms beeps
+FADE_SECONDS = 0.01         # Fade in/out to avoid clicks at the ends
+VOLUME = 0.3
+MAX_SECONDS = 600           # Longest clip rendered (about 26 MB of samples)
+DEFAULT_SECONDS = 20.0
+
+
+def map_y_to_freq(y, height, min_freq=MIN_FREQ, max_freq=MAX_FREQ):
+    """Maps y (0=top) to a frequency: max_freq at the top, min_freq at the bottom. Works on arrays."""
+    percent_y = np.clip(np.asarray(y, dtype=np.float64) / height, 0, 1)
+    return max_freq - percent_y * (max_freq - min_freq)
+
+
+def render_sonification(plan, height, duration, start=0, sample_rate=SAMPLE_RATE, volume=VOLUME):
+    """Renders segments start.. of plan as an int16 mono waveform lasting duration seconds.
+
+    Segments are spread evenly over the clip, matching draw progress, which is
+    measured in segments. Each note holds the pitch of the segment that is
+    drawn when the note starts. The phase is accumulated across notes, so
+    pitch changes do not click.
+    """
+    segments = len(plan) - start
+    n = int(min(duration, MAX_SECONDS) * sample_rate)
+    if segments <= 0 or n <= 0:
+        return np.zeros(0, dtype=np.int16)
+
+    note_len = max(1, int(NOTE_SECONDS * sample_rate))
+    note_starts = np.arange(0, n, note_len)
+    seg_index = start + note_starts * segments // n
+    note_freqs = map_y_to_freq(plan.starts[seg_index, 1], height)
+
+    freqs = np.repeat(note_freqs, note_len)[:n]
+    phase = np.cumsum(2 * np.pi * freqs / sample_rate)
+    wave_data = np.sin(phase) * volume
+
+    fade = min(int(FADE_SECONDS * sample_rate), n // 2)
+    if fade:
+        ramp = np.linspace(0, 1, fade)
+        wave_data[:fade] *= ramp
+        wave_data[-fade:] *= ramp[::-1]
+    return (wave_data * 32767).astype(np.int16)
+
+
+def trim_start(samples, seconds, sample_rate=SAMPLE_RATE):
+    """Drops the first seconds of samples and fades in the new start, so the cut does not click."""
+    samples = samples[max(0, int(seconds * sample_rate)):]
+    fade = min(int(FADE_SECONDS * sample_rate), len(samples))
+    if seconds > 0 and fade:
+        samples = samples.copy()
+        samples[:fade] = (samples[:fade] * np.linspace(0, 1, fade)).astype(np.int16)
+    return samples
+
+
+def write_wav(path, samples, sample_rate=SAMPLE_RATE):
+    """Writes int16 mono samples to a WAV file."""
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.tobytes())
+
+
+def find_player():
+    """Returns the playback command for this platform ("winsound" or an argv prefix), or None."""
+    if winsound is not None:
+        return "winsound"
+    for cmd in (["afplay"], ["paplay"], ["aplay", "-q"]):
+        if shutil.which(cmd[0]):
+            return cmd
+    return None
+
+
+class SoundPlayer:
+    """Plays pre-rendered sonification clips without blocking the caller.
+
+    Rendering and starting playback run on a single worker thread. play()
+    records when the clip was requested, and playback skips whatever the
+    render took, so the audio lines up with that time. drift() compares the
+    audio position with draw progress, and the caller can restart the clip
+    when they diverge.
+    """
+
+    def __init__(self):
+        self.player = find_player()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.lock = threading.Lock()
+        self.proc = None
+        self.wav_path = None
+        self.generation = 0  # Bumped on play/stop so stale renders never start
+        self.clip = None     # (start_segment, total_segments, duration, start_time)
+
+    @property
+    def available(self):
+        return self.player is not None
+
+    def play(self, plan, height, start, duration):
+        """Renders segments start.. over duration seconds and plays them asynchronously."""
+        if not self.available or start >= len(plan) or duration <= 0:
+            return
+        self.stop()
+        with self.lock:
+            self.generation += 1
+            generation = self.generation
+            started = time.perf_counter()
+            self.clip = (start, len(plan), duration, started)
+        self.executor.submit(self._render_and_play, generation, plan, height, start, duration, started)
+
+    def _render_and_play(self, generation, plan, height, start, duration, started):
+        samples = render_sonification(plan, height, duration, start)
+        # Start where the clip should be by now, not where it began
+        samples = trim_start(samples, time.perf_counter() - started)
+        if len(samples) == 0:
+            return
+        fd, path = tempfile.mkstemp(suffix=".wav", prefix="vector_sound_")
+        os.close(fd)
+        write_wav(path, samples)
+
+        with self.lock:
+            if generation != self.generation:
+                os.remove(path)
+                return
+            self._remove_wav()
+            self.wav_path = path
+            if self.player == "winsound":
+                winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC)
+            else:
+                self.proc = subprocess.Popen(self.player + [path], stdout=subprocess.DEVNULL,
+                                             stderr=subprocess.DEVNULL)
+
+    def drift(self, cursor, now=None):
+        """Seconds between the audio position and draw progress at cursor (0 if not playing)."""
+        if self.clip is None:
+            return 0.0
+        start, total, duration, started = self.clip
+        now = time.perf_counter() if now is None else now
+        segments_per_s = (total - start) / duration
+        heard = start + min(now - started, duration) * segments_per_s
+        return abs(heard - cursor) / segments_per_s
+
+    def stop(self):
+        with self.lock:
+            self.generation += 1
+            self.clip = None
+            if self.player == "winsound":
+                winsound.PlaySound(None, 0)
+            elif self.proc is not None:
+                self.proc.terminate()
+            self.proc = None
+
+    def close(self):
+        self.stop()
+        self.executor.shutdown(wait=True)
+        with self.lock:
+            self._remove_wav()
+
+    def _remove_wav(self):
+        if self.wav_path is not None:
+            try:
+                os.remove(self.wav_path)
+            except OSError:
+                pass  # Still open by the player on Windows
+            self.wav_path = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render an image's drawing sonification to a WAV file.")
+    parser.add_argument("input", help="Input image.")
+    parser.add_argument("-o", "--output", required=True, help="Output .wav file.")
+    parser.add_argument("--seconds", type=float, default=DEFAULT_SECONDS, help="Length of the clip.")
+    vector_batch.add_pipeline_args(parser)
+    args = parser.parse_args(argv)
+    params = vector_batch.params_from_args(args)
+
+    loaded = vector_batch.load_plan(args.input, params)
+    if loaded is None:
+        print(f"Could not read {args.input}", file=sys.stderr)
+        return 1
+    img, _, _, plan = loaded
+
+    start = time.perf_counter()
+    samples = render_sonification(plan, img.shape[0], args.seconds)
+    write_wav(args.output, samples)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {len(samples) / SAMPLE_RATE:.1f} s of audio for {len(plan)} segments "
+          f"to {args.output} in {elapsed:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""Full-resolution tiled vectorization for very large scans.
+
+Instead of resizing to IMG_SIZE, the source is processed at full resolution in
+overlapping tiles:
+
+1. The source is opened as a read-only memory map. .npy files are mapped
+   directly; other formats are decoded once and spilled to a scratch .npy so
+   that workers read tiles through the page cache instead of holding copies.
+2. Each worker runs Canny/dilate on its tile plus an overlap margin, keeps the
+   tile core and traces contours there.
+3. Contours cut by a tile seam are split where they run along the seam, and the
+   open pieces are re-joined with their neighbours on the other side.
+4. The output is rendered tile by tile and written as one PNG per tile plus a
+   manifest.json, so peak canvas memory is one tile.
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+from multiprocessing import Pool
+
+import cv2
+import numpy as np
+
+import vector_core
+from vector_trace import TRACER
+
+DEFAULT_TILE_SIZE = 2048
+DEFAULT_OVERLAP = 32
+SEAM_JOIN_DIST = 2  # Max Chebyshev distance between endpoints joined across a seam
+
+
+def open_source(path, scratch_dir):
+    """Returns (array, npy_path) for path, with array a read-only memory map."""
+    if path.lower().endswith(".npy"):
+        return np.load(path, mmap_mode="r"), path
+
+    # PNG/JPEG can't be decoded by region, so decode once and spill to disk
+    img = cv2.imread(path, cv2.IMREAD_COLOR)
+    if img is None:
+        return None, None
+    spill_path = os.path.join(scratch_dir, "source.npy")
+    spill = np.lib.format.open_memmap(spill_path, mode="w+", dtype=np.uint8, shape=img.shape)
+    spill[:] = img
+    spill.flush()
+    del spill, img
+    return np.load(spill_path, mmap_mode="r"), spill_path
+
+
+def split_at_seams(pts, box, width, height):
+    """Splits a closed contour (N, 2) where it runs along an interior tile seam.
+
+    Returns (pieces, touched): the open pieces (or the contour itself) and
+    whether it was split.
+    """
+    x0, y0, x1, y1 = box
+    x, y = pts[:, 0], pts[:, 1]
+    on_seam = []
+    if x0 > 0:
+        on_seam.append(x == x0)
+    if x1 < width:
+        on_seam.append(x == x1 - 1)
+    if y0 > 0:
+        on_seam.append(y == y0)
+    if y1 < height:
+        on_seam.append(y == y1 - 1)
+
+    # Segment i -> i + 1 (cyclic) is a seam segment if both ends lie on the same seam
+    seam_seg = np.zeros(len(pts), dtype=bool)
+    for mask in on_seam:
+        seam_seg |= mask & np.roll(mask, -1)
+    if not seam_seg.any():
+        return [pts], False
+
+    # Drop the seam segments; each stretch between two cuts becomes an open piece
+    n = len(pts)
+    cuts = np.flatnonzero(seam_seg)
+    pieces = []
+    for k, cut in enumerate(cuts):
+        next_cut = cuts[(k + 1) % len(cuts)]
+        if next_cut <= cut:
+            next_cut += n
+        idx = np.arange(cut + 1, next_cut + 1) % n
+        if len(idx) >= 2:
+            pieces.append(pts[idx])
+    return pieces, True
+
+
+def process_tile(job):
+    """Worker: extracts contours from one tile core. Returns (closed, open_pieces, trace_events)."""
+    npy_path, box, overlap, params = job
+    if params.get("trace_origin") is not None:
+        # Same shared origin as vector_batch.process_one; drop any events inherited through fork
+        TRACER.enabled, TRACER.origin = True, params["trace_origin"]
+        TRACER.take_events()
+    t0 = time.perf_counter()
+    src = np.load(npy_path, mmap_mode="r")
+    height, width = src.shape[:2]
+    x0, y0, x1, y1 = box
+
+    # Run the edge stages on the tile plus margin, then keep only the core
+    px0, py0 = max(0, x0 - overlap), max(0, y0 - overlap)
+    px1, py1 = min(width, x1 + overlap), min(height, y1 + overlap)
+    region = np.ascontiguousarray(src[py0:py1, px0:px1])
+    edges = vector_core.detect_edges(vector_core.to_gray(region), params["canny_low"], params["canny_high"])
+    core = np.ascontiguousarray(edges[y0 - py0:y1 - py0, x0 - px0:x1 - px0])
+
+    with TRACER.span("findContours"):
+        cnts, _ = cv2.findContours(core, cv2.RETR_LIST, cv2.CHAIN_APPROX_NONE)
+    offset = np.array([x0, y0], dtype=np.int32)
+    closed, open_pieces = [], []
+    for c in cnts:
+        pieces, touched = split_at_seams(c.reshape(-1, 2) + offset, box, width, height)
+        (open_pieces if touched else closed).extend(pieces)
+
+    # Ship this worker's spans back to the parent process
+    events = []
+    if TRACER.enabled:
+        TRACER.add_complete(f"tile {x0},{y0}", t0, time.perf_counter() - t0, {"contours": len(cnts)})
+        events = TRACER.take_events()
+    return closed, open_pieces, events
+
+
+def _tile_of(pt, tile_size):
+    return int(pt[0]) // tile_size, int(pt[1]) // tile_size
+
+
+def stitch_pieces(pieces, tile_size):
+    """Joins open pieces whose endpoints meet across a tile seam into polylines."""
+    # Index every endpoint by its pixel: (piece, end) with end 0 = first point, 1 = last
+    endpoints = {}
+    for i, p in enumerate(pieces):
+        for end, pt in ((0, p[0]), (1, p[-1])):
+            endpoints.setdefault((int(pt[0]), int(pt[1])), []).append((i, end))
+
+    # Greedily match each endpoint to the nearest free endpoint in another tile
+    match = {}
+    reach = range(-SEAM_JOIN_DIST, SEAM_JOIN_DIST + 1)
+    for i, p in enumerate(pieces):
+        for end, pt in ((0, p[0]), (1, p[-1])):
+            if (i, end) in match:
+                continue
+            tile = _tile_of(pt, tile_size)
+            best, best_dist = None, None
+            for dy in reach:
+                for dx in reach:
+                    for j, other_end in endpoints.get((int(pt[0]) + dx, int(pt[1]) + dy), ()):
+                        other = pieces[j][0 if other_end == 0 else -1]
+                        if (j, other_end) in match or _tile_of(other, tile_size) == tile:
+                            continue
+                        dist = max(abs(dx), abs(dy))
+                        if best is None or dist < best_dist:
+                            best, best_dist = (j, other_end), dist
+            if best is not None:
+                match[(i, end)] = best
+                match[best] = (i, end)
+
+    visited = [False] * len(pieces)
+
+    def walk(i, entry_end):
+        chain = []
+        while True:
+            visited[i] = True
+            chain.append(pieces[i] if entry_end == 0 else pieces[i][::-1])
+            nxt = match.get((i, 1 - entry_end))
+            if nxt is None or visited[nxt[0]]:
+                break
+            i, entry_end = nxt
+        return np.concatenate(chain)
+
+    stitched = []
+    # Open chains first (they have a free end), then whatever is left forms loops
+    for i in range(len(pieces)):
+        if not visited[i]:
+            if (i, 0) not in match:
+                stitched.append(walk(i, 0))
+            elif (i, 1) not in match:
+                stitched.append(walk(i, 1))
+    for i in range(len(pieces)):
+        if not visited[i]:
+            stitched.append(walk(i, 0))
+    return stitched
+
+
+def extract_contours_tiled(npy_path, width, height, params, tile_size=DEFAULT_TILE_SIZE,
+                           overlap=DEFAULT_OVERLAP, workers=1):
+    """Runs tile extraction in a process pool and stitches seams. Returns sorted contours."""
+    jobs = [(npy_path, box, overlap, params) for _, _, box in vector_core.tile_grid(width, height, tile_size)]
+
+    closed, open_pieces = [], []
+    with Pool(max(1, workers)) as pool:
+        # imap keeps tile order, so the output is deterministic
+        for tile_closed, tile_open, events in pool.imap(process_tile, jobs):
+            closed.extend(tile_closed)
+            open_pieces.extend(tile_open)
+            TRACER.events.extend(events)
+
+    contours = [c.reshape(-1, 1, 2).astype(np.int32)
+                for c in closed + stitch_pieces(open_pieces, tile_size)
+                if len(c) >= params["min_contour"]]
+    return sorted(contours, key=cv2.contourArea, reverse=True)
+
+
+def render_tiles(plan, width, height, out_dir, params, tile_size=DEFAULT_TILE_SIZE):
+    """Renders the plan tile by tile to PNG files. Returns the manifest tile list."""
+    runs = plan.runs(0, len(plan), params["sampled_color"])
+    bboxes = plan.run_bboxes(runs[0], runs[1])
+    line_type = cv2.LINE_AA if params["antialias"] else cv2.LINE_8
+
+    tiles = []
+    for row, col, box in vector_core.tile_grid(width, height, tile_size):
+        tile = vector_core.render_tile(plan, runs, bboxes, box, (width, height), params["thickness"],
+                                       params["line_color"], params["bg_color"], line_type, params["supersample"])
+        name = f"tile_r{row:03d}_c{col:03d}.png"
+        cv2.imwrite(os.path.join(out_dir, name), tile)
+        x0, y0, x1, y1 = box
+        tiles.append({"file": name, "row": row, "col": col, "x": x0, "y": y0, "w": x1 - x0, "h": y1 - y0})
+    return tiles
+
+
+def vectorize_tiled(path, out_dir, params, tile_size=DEFAULT_TILE_SIZE, overlap=DEFAULT_OVERLAP, workers=1):
+    """Vectorizes one image at full resolution into out_dir. Returns a result dict like vector_batch."""
+    result = {"path": path, "output": None, "contours": 0, "error": None, "timings": {}}
+    scratch_dir = tempfile.mkdtemp(prefix="vector_tiles_")
+    src = None
+    try:
+        t0 = time.perf_counter()
+        src, npy_path = open_source(path, scratch_dir)
+        if src is None:
+            result["error"] = "could not read image"
+            return result
+        height, width = src.shape[:2]
+        t1 = time.perf_counter()
+
+        contours = extract_contours_tiled(npy_path, width, height, params, tile_size, overlap, workers)
+        contours = vector_core.ContourStore.from_contours(contours, params["simplify"], params["tolerance"])
+        t2 = time.perf_counter()
+
+        os.makedirs(out_dir, exist_ok=True)
+        plan = vector_core.SegmentPlan(contours, src if params["sampled_color"] else None)
+        tiles = render_tiles(plan, width, height, out_dir, params, tile_size)
+        t3 = time.perf_counter()
+
+        manifest = {"source": path, "width": width, "height": height, "tile_size": tile_size,
+                    "contours": len(contours), "segments": len(plan), "tiles": tiles}
+        with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        t4 = time.perf_counter()
+
+        result["timings"].update(read=t1 - t0, edges=t2 - t1, render=t3 - t2, write=t4 - t3, total=t4 - t0)
+        result["output"] = out_dir
+        result["contours"] = len(contours)
+        result["footprint"] = contours.report()
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        del src  # Release the memory map before removing its file (needed on Windows)
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    return result
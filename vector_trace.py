@@ -0,0 +1,123 @@
+"""Lightweight timing instrumentation with Chrome-trace export.
+
+TRACER is a process-wide tracer that the core, the GUI and the CLIs record
+spans into. It is off by default, and a disabled span costs one attribute check.
+When enabled, spans are kept in a bounded buffer and can be written as a
+Chrome trace (open in chrome://tracing or https://ui.perfetto.dev).
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+MAX_EVENTS = 500_000
+
+_NULL_SPAN = nullcontext()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.tracer.add_complete(self.name, self.start, end - self.start, self.args)
+        return False
+
+
+class Tracer:
+    """Records timed spans and counters as Chrome trace events."""
+
+    def __init__(self, enabled=False, max_events=MAX_EVENTS):
+        self.enabled = enabled
+        self.events = deque(maxlen=max_events)
+        self.origin = time.perf_counter()
+
+    def span(self, name, **args):
+        """Context manager timing a block. A shared no-op when disabled."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def add_complete(self, name, start, duration, args=None):
+        """Records a finished span from perf_counter() start and duration in seconds."""
+        event = {"name": name, "ph": "X", "ts": (start - self.origin) * 1e6, "dur": duration * 1e6,
+                 "pid": os.getpid(), "tid": threading.get_ident()}
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def counter(self, name, **values):
+        """Records counter values (e.g. fps) shown as a graph in the trace viewer."""
+        if self.enabled:
+            self.events.append({"name": name, "ph": "C", "ts": (time.perf_counter() - self.origin) * 1e6,
+                                "pid": os.getpid(), "args": values})
+
+    def clear(self):
+        self.events.clear()
+        self.origin = time.perf_counter()
+
+    def take_events(self):
+        """Returns and clears the recorded events (used to ship them from worker processes)."""
+        events = list(self.events)
+        self.events.clear()
+        return events
+
+    def export(self, path, extra_events=()):
+        """Writes the recorded events (plus extra_events) as a Chrome trace JSON file."""
+        with open(path, "w") as f:
+            json.dump({"traceEvents": list(self.events) + list(extra_events), "displayTimeUnit": "ms"}, f)
+
+
+class RateMeter:
+    """Rolling frames-per-second and items-per-second over a short window."""
+
+    def __init__(self, window=1.0):
+        self.window = window
+        self.samples = deque()  # (time, items)
+
+    def reset(self):
+        self.samples.clear()
+
+    def tick(self, items, now=None):
+        now = time.perf_counter() if now is None else now
+        self.samples.append((now, items))
+        while self.samples and now - self.samples[0][0] > self.window:
+            self.samples.popleft()
+
+    def rates(self):
+        """Returns (frames_per_s, items_per_s) over the window."""
+        if len(self.samples) < 2:
+            return 0.0, 0.0
+        elapsed = self.samples[-1][0] - self.samples[0][0]
+        if elapsed <= 0:
+            return 0.0, 0.0
+        items = sum(n for _, n in list(self.samples)[1:])
+        return (len(self.samples) - 1) / elapsed, items / elapsed
+
+
+TRACER = Tracer()
+
+
+def traced(name):
+    """Decorator recording each call of a function as a span on TRACER."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return fn(*args, **kwargs)
+            with TRACER.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
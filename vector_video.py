@@ -0,0 +1,134 @@
+"""Streaming vectorization of videos and image sequences.
+
+Frames are read one at a time from a generator and handed to a thread pool
+(OpenCV releases the GIL, so the edge and drawing stages run in parallel). At
+most --queue frames are in flight, and results are written in submission order,
+so frame ordering is preserved and memory stays flat however long the input is.
+
+Example:
+    python vector_video.py clip.mp4 -o clip_vector.mp4 --workers 4
+    python vector_video.py "frames/*.png" -o seq.mp4 --fps 12 --white-bg
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+
+import vector_batch
+import vector_core
+
+DEFAULT_FPS = 24.0
+REPORT_EVERY = 2.0  # Seconds between progress lines
+
+
+def open_frames(source, size=None):
+    """Returns (frames, fps): a frame generator and the source frame rate (None if unknown).
+
+    source is a video file, a directory of images or a glob pattern.
+    """
+    if os.path.isdir(source) or glob.has_magic(source):
+        pattern = os.path.join(source, "*") if os.path.isdir(source) else source
+        paths = sorted(p for p in glob.glob(pattern) if p.lower().endswith(vector_batch.IMAGE_EXTS))
+
+        def image_frames():
+            for path in paths:
+                frame = vector_core.load_image(path, size)
+                if frame is not None:
+                    yield frame
+        return image_frames(), None
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise IOError(f"could not open {source}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or None
+
+    def video_frames():
+        try:
+            while True:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                yield frame if size is None else cv2.resize(frame, size)
+        finally:
+            cap.release()
+    return video_frames(), fps
+
+
+def vectorize_frame(frame, params):
+    """Runs the still-image pipeline on one frame and returns the rendered canvas."""
+    canvas, _ = vector_core.vectorize(frame, params["canny_low"], params["canny_high"], params["min_contour"],
+                                      params["thickness"], params["bg_color"], params["line_color"],
+                                      params["sampled_color"], params["simplify"], params["tolerance"],
+                                      cv2.LINE_AA if params["antialias"] else cv2.LINE_8, params["supersample"])
+    return canvas
+
+
+def vectorize_stream(frames, output, params, fps=DEFAULT_FPS, workers=1, max_in_flight=None, log=print):
+    """Vectorizes frames into a video file. Returns (frame_count, seconds)."""
+    writer = None
+    written = 0
+    start = last_report = time.perf_counter()
+
+    def write(canvas):
+        nonlocal writer, written, last_report
+        if writer is None:
+            h, w = canvas.shape[:2]
+            writer = cv2.VideoWriter(output, cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+            if not writer.isOpened():
+                raise IOError(f"could not open {output} for writing")
+        writer.write(canvas)
+        written += 1
+
+        now = time.perf_counter()
+        if now - last_report >= REPORT_EVERY:
+            log(f"{written} frames, {written / (now - start):.1f} fps")
+            last_report = now
+
+    try:
+        for canvas in vector_batch.ordered_map(lambda frame: vectorize_frame(frame, params), frames,
+                                               workers, max_in_flight):
+            write(canvas)
+    finally:
+        if writer is not None:
+            writer.release()
+
+    return written, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vectorize a video or image sequence into a video.")
+    parser.add_argument("input", help="Video file, directory of frames or glob pattern.")
+    parser.add_argument("-o", "--output", required=True, help="Output video (.mp4).")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of worker threads (default: CPU count).")
+    parser.add_argument("--queue", type=int, default=None,
+                        help="Max frames in flight (default: 2 x workers).")
+    parser.add_argument("--fps", type=float, default=None,
+                        help=f"Output frame rate (default: source rate, or {DEFAULT_FPS:g} for sequences).")
+    vector_batch.add_pipeline_args(parser)
+    parser.set_defaults(size=None)  # Keep the source resolution unless --size is given
+    args = parser.parse_args(argv)
+    params = vector_batch.params_from_args(args)
+
+    try:
+        frames, source_fps = open_frames(args.input, params["size"])
+        fps = args.fps or source_fps or DEFAULT_FPS
+        workers = max(1, args.workers)
+        count, elapsed = vectorize_stream(frames, args.output, params, fps, workers,
+                                          args.queue and max(1, args.queue))
+    except IOError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if count == 0:
+        print("No frames found.", file=sys.stderr)
+        return 1
+    print(f"Wrote {count} frames to {args.output} in {elapsed:.1f} s ({count / elapsed:.1f} fps)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
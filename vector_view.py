@@ -0,0 +1,149 @@
+"""Level-of-detail zoom and pan for the vector canvas.
+
+ImagePyramid keeps half-resolution copies of an image down to
+MIN_LEVEL_SIZE. As strokes are drawn, update() recomputes only the levels
+under the changed box, so the pyramid never has to be rebuilt while
+drawing. Level 0 is the image itself, not a copy.
+
+render_view() draws only the visible part of the display. It samples the
+coarsest level that still has at least one pixel per display pixel, so the
+cost depends on the display size, not the canvas size, at any zoom.
+Magnified pixels are drawn with nearest-neighbour sampling so single strokes
+can be inspected. Every display pixel is mapped on its own, so rendering a
+sub-box gives exactly the pixels a full render would.
+"""
+import math
+
+import cv2
+import numpy as np
+
+MIN_LEVEL_SIZE = 64     # Stop halving once the longest side is this small
+MAX_ZOOM = 32.0         # Relative to fitting the whole image in the display
+VIEW_BG = (26, 26, 26)  # Outside the image; matches the label's gray10
+
+
+def half_size(img):
+    """2x2 box average of img. An odd last row or column is averaged with itself."""
+    h, w = img.shape[:2]
+    if h % 2 or w % 2:
+        img = cv2.copyMakeBorder(img, 0, h % 2, 0, w % 2, cv2.BORDER_REPLICATE)
+    return cv2.resize(img, (img.shape[1] // 2, img.shape[0] // 2), interpolation=cv2.INTER_AREA)
+
+
+class ImagePyramid:
+    """An image plus successively halved copies, kept in sync box by box."""
+
+    def __init__(self, img, min_size=MIN_LEVEL_SIZE):
+        self.levels = [img]
+        while max(self.levels[-1].shape[:2]) > min_size:
+            self.levels.append(half_size(self.levels[-1]))
+
+    @property
+    def size(self):
+        """(width, height) of level 0."""
+        return self.levels[0].shape[1::-1]
+
+    def update(self, x0, y0, x1, y1):
+        """Recomputes every level under a changed box of level 0 (x1, y1 exclusive)."""
+        for src, dst in zip(self.levels, self.levels[1:]):
+            h, w = dst.shape[:2]
+            x0, y0 = x0 // 2, y0 // 2
+            x1, y1 = min(w, -(-x1 // 2)), min(h, -(-y1 // 2))
+            if x0 >= x1 or y0 >= y1:
+                return
+            dst[y0:y1, x0:x1] = half_size(src[2 * y0:2 * y1, 2 * x0:2 * x1])
+
+
+class Viewport:
+    """Zoom and pan state mapping an image onto a fixed-size display.
+
+    zoom is relative to fitting the whole image, so 1 always shows
+    everything. The center is in image pixels and is kept where the view
+    stays inside the image whenever the image fills the display.
+    """
+
+    def __init__(self, display_size, image_size=None):
+        self.display_size = display_size
+        self.image_size = None
+        self.set_image_size(image_size or display_size)
+
+    def set_image_size(self, size):
+        """Switches to an image of a new size; the view resets only if the size changed."""
+        if tuple(size) != self.image_size:
+            self.image_size = tuple(size)
+            self.reset()
+
+    def reset(self):
+        self.zoom = 1.0
+        self.center = (self.image_size[0] / 2, self.image_size[1] / 2)
+
+    @property
+    def scale(self):
+        """Display pixels per image pixel."""
+        return min(self.display_size[0] / self.image_size[0], self.display_size[1] / self.image_size[1]) * self.zoom
+
+    def origin(self):
+        """Image coordinates of the display's top-left corner."""
+        return (self.center[0] - self.display_size[0] / 2 / self.scale,
+                self.center[1] - self.display_size[1] / 2 / self.scale)
+
+    def to_image(self, u, v):
+        ox, oy = self.origin()
+        return ox + u / self.scale, oy + v / self.scale
+
+    def zoom_at(self, factor, u, v):
+        """Zooms by factor, keeping the image point under display pixel (u, v) in place."""
+        x, y = self.to_image(u, v)
+        self.zoom = min(MAX_ZOOM, max(1.0, self.zoom * factor))
+        self.center = (x - (u - self.display_size[0] / 2) / self.scale,
+                       y - (v - self.display_size[1] / 2) / self.scale)
+        self._clamp()
+
+    def pan(self, du, dv):
+        """Moves the image by (du, dv) display pixels."""
+        self.center = (self.center[0] - du / self.scale, self.center[1] - dv / self.scale)
+        self._clamp()
+
+    def _clamp(self):
+        center = []
+        for c, image_len, display_len in zip(self.center, self.image_size, self.display_size):
+            half = display_len / 2 / self.scale
+            center.append(image_len / 2 if 2 * half >= image_len else min(max(c, half), image_len - half))
+        self.center = tuple(center)
+
+    def display_box(self, x0, y0, x1, y1, margin=1):
+        """Display box covering an image box (x1, y1 exclusive), clipped to the display. None if off screen."""
+        ox, oy = self.origin()
+        s = self.scale
+        u0, v0 = max(0, math.floor((x0 - ox) * s) - margin), max(0, math.floor((y0 - oy) * s) - margin)
+        u1 = min(self.display_size[0], math.ceil((x1 - ox) * s) + margin)
+        v1 = min(self.display_size[1], math.ceil((y1 - oy) * s) + margin)
+        if u0 >= u1 or v0 >= v1:
+            return None
+        return u0, v0, u1, v1
+
+    def level(self, num_levels):
+        """Index of the coarsest pyramid level with at least one pixel per display pixel."""
+        if self.scale >= 1:
+            return 0
+        return min(num_levels - 1, int(math.floor(math.log2(1 / self.scale) + 1e-9)))
+
+
+def render_view(pyramid, viewport, box=None, bg=VIEW_BG):
+    """Renders the visible image, or only display box (u0, v0, u1, v1). Returns (image, level)."""
+    u0, v0, u1, v1 = box or (0, 0) + tuple(viewport.display_size)
+    level = viewport.level(len(pyramid.levels))
+    src = pyramid.levels[level]
+    factor = 2 ** level
+
+    # Display pixel center (u + 0.5) -> image x -> level pixel index (centers at integers).
+    # Each coordinate depends only on its own display pixel, so sub-boxes match a full render.
+    ox, oy = viewport.origin()
+    xs = ((ox + (np.arange(u0, u1) + 0.5) / viewport.scale) / factor - 0.5).astype(np.float32)
+    ys = ((oy + (np.arange(v0, v1) + 0.5) / viewport.scale) / factor - 0.5).astype(np.float32)
+    map_x = np.broadcast_to(xs, (len(ys), len(xs)))
+    map_y = np.broadcast_to(ys[:, None], (len(ys), len(xs)))
+    interpolation = cv2.INTER_NEAREST if viewport.scale * factor >= 1 else cv2.INTER_LINEAR
+    view = cv2.remap(src, np.ascontiguousarray(map_x), np.ascontiguousarray(map_y), interpolation,
+                     borderMode=cv2.BORDER_CONSTANT, borderValue=bg)
+    return view, level